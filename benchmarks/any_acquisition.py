@@ -0,0 +1,35 @@
+import time
+from chronon import ProcessManager, EventManager, Process
+
+
+N_USERS = 500  # Users acquiring any resource of the fleet
+N_RESOURCES = [10, 100, 1000]  # Resources in the fleet
+
+
+class UseAny(Process):
+    def definition(self, user):
+        yield user.waits(self.get_resources(by_properties={'type': 'fleet'}), which='any')
+        # Holding the resource long enough to keep the fleet busy and users waiting
+        yield user.waits(user.duration)
+        user.releases(self.get_resources(by_user=user))
+
+
+def build(n_resources):
+    pm = ProcessManager()
+    pm.create_resource([f'unit_{i}' for i in range(n_resources)], type='fleet')
+    pm.attach_process(UseAny)
+    em = EventManager(pm)
+    for u in range(N_USERS):
+        em.create_user(f'user_{u}', instant=u * 0.5, duration=n_resources * 0.6)
+    return em
+
+
+if __name__ == '__main__':
+    # Each user acquires and releases a resource once
+    print(f'{"resources":>10} {"seconds":>10} {"us/user":>10}')
+    for n in N_RESOURCES:
+        em = build(n)
+        start = time.perf_counter()
+        em.run()
+        elapsed = time.perf_counter() - start
+        print(f'{n:>10} {elapsed:>10.3f} {1e6 * elapsed / N_USERS:>10.1f}')
@@ -0,0 +1,197 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from chronon import ProcessManager, EventManager, Process
+
+
+LOAD = 0.9  # Target utilisation of the resources
+SERVICE = 1.0  # Mean time a user holds its resources
+
+# Parameters of the models: number of users and resources, resources requested
+# at once (synched), resources any of which is requested (fan_out), and fraction
+# of users with a patience
+SCENARIOS = {
+    'baseline': dict(users=2000, resources=10, synched=1, fan_out=1, renege=0),
+    'resources': dict(users=2000, resources=1000, synched=1, fan_out=1, renege=0),
+    'synched': dict(users=2000, resources=10, synched=3, fan_out=1, renege=0),
+    'any': dict(users=2000, resources=100, synched=1, fan_out=10, renege=0),
+    'renege': dict(users=2000, resources=10, synched=1, fan_out=1, renege=0.5),
+    'users': dict(users=20000, resources=10, synched=1, fan_out=1, renege=0),
+}
+
+
+class UseResources(Process):
+    def definition(self, user):
+        arrive = self.env.now
+        if user.fan_out > 1:
+            yield user.waits(user.resources, which='any', patience=user.patience)
+        else:
+            yield user.waits(user.resources, patience=user.patience)
+
+        # Users reneging are withdrawn from the queues once their patience expires
+        if user.patience == 'unlimited' or self.env.now - arrive < user.patience:
+            yield user.waits(user.service)
+            if user.fan_out > 1:
+                user.releases(self.get_resources(by_user=user))
+            else:
+                user.releases(user.resources)
+
+
+def build(users, resources, synched, fan_out, renege, seed=0):
+    """Build a model of `users` arriving at random to use `resources`.
+
+    Args:
+        users (int): number of users
+        resources (int): number of resources, of capacity 1
+        synched (int): number of resources each user requests at once
+        fan_out (int): number of resources each user requests any of
+        renege (float): fraction of users with a patience
+        seed (int): seed of the random numbers
+
+    Returns:
+        :class:`.EventManager`
+    """
+    rng = random.Random(seed)
+    pm = ProcessManager()
+    names = [f'resource_{i}' for i in range(resources)]
+    pm.create_resource(names)
+    pm.attach_process(UseResources)
+    em = EventManager(pm)
+
+    rate = LOAD * resources / (SERVICE * synched)
+    instant = 0
+    for u in range(users):
+        instant += rng.expovariate(rate)
+        em.create_user(
+            f'user_{u}',
+            instant=instant,
+            resources=rng.sample(names, max(synched, fan_out)),
+            fan_out=fan_out,
+            service=rng.expovariate(1 / SERVICE),
+            patience=rng.expovariate(1 / SERVICE) if rng.random() < renege
+            else 'unlimited'
+        )
+    return em
+
+
+def count_events(em):
+    """Count the events processed by the environment of `em`.
+
+    Returns:
+        list: with the number of events processed so far
+    """
+    env = em.pm.env
+    count = [0]
+    step = env.step
+
+    def counted_step():
+        count[0] += 1
+        step()
+
+    env.step = counted_step
+    return count
+
+
+def measure(params, repeat=3):
+    """Run a model `repeat` times, measuring the best wall time and the peak
+    memory of an extra traced run.
+
+    Args:
+        params (dict): parameters of :func:`build`
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: wall time, events, events per second and peak memory
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        em = build(**params)
+        events = count_events(em)
+        start = time.perf_counter()
+        em.run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    # Memory is traced separately, as tracing slows the run down
+    tracemalloc.start()
+    em = build(**params)
+    em.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'seconds': seconds,
+        'events': events[0],
+        'events_per_second': events[0] / seconds,
+        'peak_memory_mb': peak / 2 ** 20,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the simulation kernel')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help=f'scenarios to run, among {list(SCENARIOS)}')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='factor applied to the number of users')
+    parser.add_argument('--output', default='benchmarks/kernel_results.jsonl',
+                        help='file the results are appended to')
+    parser.add_argument('--compare', metavar='COMMIT',
+                        help='stored commit to compare the results with')
+    args = parser.parse_args()
+
+    baseline = {
+        r['scenario']: r for r in load_results(args.output)
+        if args.compare and r['commit'] == args.compare and r['scale'] == args.scale
+    }
+    commit = git_commit()
+    print(f'{"scenario":>10} {"seconds":>10} {"events":>10} {"events/s":>10} '
+          f'{"peak MB":>10} {"vs base":>10}')
+    with open(args.output, 'a') as f:
+        for scenario in args.scenarios:
+            params = dict(SCENARIOS[scenario])
+            params['users'] = int(params['users'] * args.scale)
+            result = measure(params, args.repeat)
+            record = {
+                'scenario': scenario,
+                'commit': commit,
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'scale': args.scale,
+                'params': params,
+                **result
+            }
+            f.write(json.dumps(record) + '\n')
+
+            base = baseline.get(scenario)
+            ratio = f'{result["events_per_second"] / base["events_per_second"]:.2f}x' \
+                if base else '-'
+            print(f'{scenario:>10} {result["seconds"]:>10.3f} {result["events"]:>10} '
+                  f'{result["events_per_second"]:>10.0f} '
+                  f'{result["peak_memory_mb"]:>10.1f} {ratio:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import time
+from chronon import ProcessManager, EventManager, Process
+
+
+N_USERS = 500  # Users competing for a single counter
+N_RESOURCES = [10, 100, 1000, 10000]  # Idle resources in the model
+
+
+class UseCounter(Process):
+    def definition(self, user):
+        yield user.waits('counter')
+        yield user.waits(1)
+        user.releases('counter')
+
+
+def build(n_resources):
+    pm = ProcessManager()
+    pm.create_resource('counter', capacity=1)
+    # Idle resources which are never requested, but live in the same manager
+    pm.create_resource([f'idle_{i}' for i in range(n_resources)])
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    for u in range(N_USERS):
+        em.create_user(f'user_{u}', instant=u * 0.5)
+    return em
+
+
+if __name__ == '__main__':
+    # Each user requests and releases the counter once
+    n_events = 2 * N_USERS
+    print(f'{"resources":>10} {"seconds":>10} {"us/event":>10}')
+    for n in N_RESOURCES:
+        em = build(n)
+        start = time.perf_counter()
+        em.run()
+        elapsed = time.perf_counter() - start
+        print(f'{n:>10} {elapsed:>10.3f} {1e6 * elapsed / n_events:>10.1f}')
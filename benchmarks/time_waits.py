@@ -0,0 +1,57 @@
+import time
+import tracemalloc
+import simpy
+from chronon import ProcessManager, EventManager, Process
+
+
+N_USERS = 1000  # Users going through the delay steps
+N_STEPS = 100  # Delay steps of each user
+
+
+def legacy_waits(user, duration):
+    """Delay as it was waited for before, a timeout in a condition OR-ed with a
+    never triggered patience event"""
+    env = user.env
+    return env.all_of([env.timeout(duration)]) | simpy.Event(env)
+
+
+class Delays(Process):
+    def definition(self, user):
+        for _ in range(N_STEPS):
+            yield user.waits_delay(user, 1)
+
+
+def build(waits_delay):
+    pm = ProcessManager()
+    pm.attach_process(Delays)
+    em = EventManager(pm)
+    for u in range(N_USERS):
+        em.create_user(f'user_{u}', instant=u * 0.001, waits_delay=waits_delay)
+    return em
+
+
+def bytes_per_wait(waits_delay, n=10000):
+    """Memory allocated by each wait, kept alive until measured"""
+    em = build(waits_delay)
+    user = em.get_user('user_0')
+    tracemalloc.start()
+    waits = [waits_delay(user, 1) for _ in range(n)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del waits
+    return allocated / n
+
+
+if __name__ == '__main__':
+    n_steps = N_USERS * N_STEPS
+    print(f'{"waits":>10} {"seconds":>10} {"us/step":>10} {"bytes/step":>10}')
+    for name, waits_delay in [
+        ('legacy', legacy_waits),
+        ('bare', lambda user, duration: user.waits(duration)),
+    ]:
+        em = build(waits_delay)
+        start = time.perf_counter()
+        em.run()
+        elapsed = time.perf_counter() - start
+        print(f'{name:>10} {elapsed:>10.3f} {1e6 * elapsed / n_steps:>10.2f} '
+              f'{bytes_per_wait(waits_delay):>10.0f}')
@@ -1,5 +1,10 @@
 # flake8: noqa
+from .checkpoint import *
 from .event import *
 from .process import *
+from .profiler import *
 from .resource import *
+from .stats import *
+from .trace import *
+from .usage import *
 from .user import *
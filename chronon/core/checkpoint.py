@@ -0,0 +1,178 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pandas import DataFrame
+
+CHECKPOINT_COLUMNS = ['user', 'instant', 'info']
+
+
+class CheckpointLog:
+    def __init__(self):
+        """Columnar, append-only log of the checkpoints of all users.
+
+        As the simulation clock never goes back, records are appended in time order
+        and can be looked up by instant with a binary search. Positions of the
+        records of each user are indexed as well.
+        """
+        self.users = []
+        self.infos = []
+        self._user_ids = {}
+        self._info_ids = {}
+        self._user_datetimes = array('b')
+        self._user_positions = []
+        self._instant = array('d')
+        self._user = array('i')
+        self._info = array('i')
+        # Instants are stored as floats, but reported as ints if all of them are
+        self._int_instants = True
+        # Trace sink checkpoints are streamed to instead, if set
+        self.sink = None
+
+    def __len__(self):
+        return len(self._instant)
+
+    def _intern_user(self, user):
+        if user.name not in self._user_ids:
+            self._user_ids[user.name] = len(self.users)
+            self.users.append(user.name)
+            self._user_datetimes.append(isinstance(user.instant, datetime))
+            self._user_positions.append(array('q'))
+        return self._user_ids[user.name]
+
+    def _intern_info(self, info):
+        # Equal values of different types, e.g. 1 and True, are kept apart
+        key = (type(info), info)
+        try:
+            info_id = self._info_ids.get(key)
+        except TypeError:
+            # Unhashable values are stored on their own
+            self.infos.append(info)
+            return len(self.infos) - 1
+        if info_id is None:
+            info_id = self._info_ids[key] = len(self.infos)
+            self.infos.append(info)
+        return info_id
+
+    def stream_to(self, sink):
+        """Stream further checkpoints to a trace sink instead of keeping them.
+
+        Args:
+            sink (:class:`.TraceSink`)
+        """
+        self.sink = sink
+
+    def record(self, instant, user, info):
+        """Append a checkpoint.
+
+        Args:
+            instant (float): simulation time
+            user (:class:`.User`)
+            info (str): identifier of the checkpoint
+        """
+        if self.sink is not None:
+            self.sink.record_checkpoint(instant, user, info)
+            return
+        u = self._intern_user(user)
+        if self._int_instants and not isinstance(instant, int):
+            self._int_instants = False
+        self._user_positions[u].append(len(self._instant))
+        self._instant.append(instant)
+        self._user.append(u)
+        self._info.append(self._intern_info(info))
+
+    def _positions(self, user=None, start=None, end=None):
+        """Positions of the records of `user` between instants `start` and `end`."""
+        if user is None:
+            positions = range(len(self._instant))
+        elif user in self._user_ids:
+            positions = self._user_positions[self._user_ids[user]]
+        else:
+            return []
+
+        # Instants of the positions are sorted, as positions themselves are
+        instants = _Instants(self._instant, positions)
+        lo = 0 if start is None else bisect_left(instants, start)
+        hi = len(positions) if end is None else bisect_right(instants, end)
+        return positions[lo:hi]
+
+    def _humanise(self, position):
+        instant = self._instant[position]
+        if self._user_datetimes[self._user[position]]:
+            return datetime.fromtimestamp(instant)
+        if self._int_instants:
+            return int(instant)
+        return instant
+
+    def get_records(self, user=None, start=None, end=None):
+        """Checkpoints, optionally filtered.
+
+        Args:
+            user (str): name of the user
+            start (float): minimum instant
+            end (float): maximum instant
+
+        Returns:
+            list: dicts with `instant` and `info` of each checkpoint, plus `user`
+            if not filtered by user
+        """
+        if self.sink is not None:
+            frame = self.to_frame(user, start, end)
+            if user is not None:
+                frame = frame.drop(columns='user')
+            return frame.to_dict('records')
+
+        records = []
+        for p in self._positions(user, start, end):
+            record = {'instant': self._humanise(p), 'info': self.infos[self._info[p]]}
+            if user is None:
+                record = {'user': self.users[self._user[p]], **record}
+            records.append(record)
+        return records
+
+    def to_frame(self, user=None, start=None, end=None):
+        """Checkpoints as a time indexed data frame, optionally filtered.
+
+        Args:
+            user (str): name of the user
+            start (float): minimum instant
+            end (float): maximum instant
+        """
+        if self.sink is not None:
+            return self.sink.reader().get_checkpoints(user, start, end)
+        return self._frame(self._positions(user, start, end))
+
+    def to_frame_from(self, position):
+        """Checkpoints recorded from a position of the log on, as a data frame.
+
+        Args:
+            position (int): number of checkpoints to skip, e.g. those already read
+        """
+        if self.sink is not None:
+            return self.sink.get_checkpoints_from(position)
+        return self._frame(range(position, len(self._instant)))
+
+    def _frame(self, positions):
+        if any(self._user_datetimes):
+            instants = [self._humanise(p) for p in positions]
+        elif self._int_instants:
+            instants = [int(self._instant[p]) for p in positions]
+        else:
+            instants = [self._instant[p] for p in positions]
+        return DataFrame({
+            'user': [self.users[self._user[p]] for p in positions],
+            'instant': instants,
+            'info': [self.infos[self._info[p]] for p in positions],
+        }, columns=CHECKPOINT_COLUMNS)
+
+
+class _Instants:
+    def __init__(self, instants, positions):
+        """Sequence of the instants at the given positions, for binary searches."""
+        self.instants = instants
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        return self.instants[self.positions[i]]
@@ -1,3 +1,6 @@
+from .stats import ProcessStats
+
+
 class Process:
     def __init__(self, env, rm, name):
         """Base class for processes definitions.
@@ -7,10 +10,15 @@ class Process:
             env (:class:`simpy.Environment`)
             rm (:class:`.ResourceManager`)
             name (str)
+
+        Attributes:
+            stats (:class:`.ProcessStats`): statistics of users going through
+                this process
         """
         self.name = name
         self.env = env
         self.rm = rm
+        self.stats = ProcessStats()
 
     def definition(self, user):
         """Definition method to be extended in custom processes.
@@ -0,0 +1,142 @@
+import time
+import simpy
+from pandas import DataFrame
+from simpy.events import Condition, Initialize
+from simpy.resources.base import Get, Put
+from .resource import AnyOfRequest
+
+# Resource methods timed, besides the processing of events
+PROFILED_METHODS = {
+    '_trigger_put': 'trigger_put',
+    '_trigger_get': 'trigger_get',
+    'update_usage': 'update_usage',
+}
+
+PROFILE_COLUMNS = ['calls', 'seconds', 'us_per_call', 'share']
+
+
+class Profiler:
+    def __init__(self, pm):
+        """Instrumentation of a simulation, timing the processing of each event and
+        the calls to the hot methods of resources while attached.
+
+        Events are timed by kind (`request`, `release`, `timeout`, `condition`,
+        `process`, `initialize` or `event`) and by component: the resource of
+        requests and releases, or the process whose code is resumed by the event
+        (the name of a :class:`.Process`, or e.g. `BaseUser.run` for the flow
+        between processes). Timings of resource methods are also included in those
+        of the events triggering them.
+
+        Args:
+            pm (:class:`.ProcessManager`)
+
+        Attributes:
+            timings (dict): calls and seconds by kind and component
+        """
+        self.pm = pm
+        self.timings = {}
+        self._patched = []
+
+    def attach(self):
+        """Start timing, by wrapping the environment step and resources methods"""
+        self._patch(self.pm.env, 'step', self._timed_step(self.pm.env.step))
+        for name in self.pm.rm.resources:
+            resource = self.pm.get_resource(name)
+            for method, kind in PROFILED_METHODS.items():
+                self._patch(
+                    resource, method, self._timed(kind, name, getattr(resource, method))
+                )
+
+    def detach(self):
+        """Stop timing, restoring the wrapped methods"""
+        for obj, attr, previous in reversed(self._patched):
+            if previous is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, previous)
+        self._patched = []
+
+    def _patch(self, obj, attr, function):
+        self._patched.append((obj, attr, obj.__dict__.get(attr)))
+        setattr(obj, attr, function)
+
+    def _add(self, kind, component, seconds):
+        timing = self.timings.get((kind, component))
+        if timing is None:
+            self.timings[kind, component] = [1, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+
+    def _timed(self, kind, component, method):
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._add(kind, component, clock() - start)
+        return timed
+
+    def _timed_step(self, step):
+        env = self.pm.env
+        clock = time.perf_counter
+
+        def timed_step():
+            if not env._queue:
+                return step()
+            kind, component = self._classify(env._queue[0][3])
+            start = clock()
+            try:
+                step()
+            finally:
+                self._add(kind, component, clock() - start)
+        return timed_step
+
+    def _classify(self, event):
+        """Kind and component of an event"""
+        if isinstance(event, (Put, AnyOfRequest)):
+            return 'request', event.resource.name if event.resource else None
+        if isinstance(event, Get):
+            return 'release', event.resource.name
+        if isinstance(event, simpy.Timeout):
+            kind = 'timeout'
+        elif isinstance(event, Condition):
+            kind = 'condition'
+        elif isinstance(event, Initialize):
+            kind = 'initialize'
+        elif isinstance(event, simpy.Process):
+            kind = 'process'
+        else:
+            kind = 'event'
+        return kind, self._resumed(event)
+
+    def _resumed(self, event):
+        """Name of the first process resumed by an event, if any"""
+        for callback in event.callbacks or ():
+            process = getattr(callback, '__self__', None)
+            if isinstance(process, simpy.Process):
+                definition = self.pm._running.get(process)
+                if definition is not None:
+                    return definition.name
+                return getattr(process._generator, '__qualname__', None)
+        return None
+
+    def summary(self):
+        """
+        Calls and time spent by kind and component, sorted by time.
+
+        Returns:
+            DataFrame: indexed by kind and component, with the share of the time
+            spent processing events
+        """
+        frame = DataFrame(
+            [(k, c, n, s) for (k, c), (n, s) in self.timings.items()],
+            columns=['kind', 'component', 'calls', 'seconds']
+        )
+        frame['us_per_call'] = 1e6 * frame['seconds'] / frame['calls']
+        events = ~frame['kind'].isin(PROFILED_METHODS.values())
+        frame['share'] = frame['seconds'] / frame.loc[events, 'seconds'].sum()
+        return frame.set_index(['kind', 'component'])[PROFILE_COLUMNS]\
+            .sort_values('seconds', ascending=False)
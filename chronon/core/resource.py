@@ -1,6 +1,8 @@
 import simpy
-from pandas import DataFrame
-from itertools import chain
+from .usage import UsageLog, UsageCounters
+
+# Values of `report`, from the most to the least detailed
+REPORT_MODES = [True, 'trace', 'sample', 'counters', False]
 
 
 class Request(simpy.resources.base.Put):
@@ -19,14 +21,37 @@ class Request(simpy.resources.base.Put):
         Keyword Args:
             user (:class:`.User`): user putting the request
             synched_resources (list): list of :class:`.Resource` to be used in synchrony
-            which (string): `all` or `any` resources in the list
+            which (string): `all` or `any` resources in the list. Requests for
+                `any` of several resources are made through :class:`.AnyOfRequest`
             having (dict): properties that should match a specific value in the resources
+            group (list): requests on the synched resources, granted at once
+            requested_at (float): instant the usage was requested, if earlier than
+                the request itself
+            ticket (:class:`._Ticket`): place the request takes over in the usage of
+                the resource, already reported as `Requested`
+            arrival (int): sequence number ordering the request among those for the
+                resource, if taken over from an earlier request
         """
         super(simpy.resources.base.Put, self).__init__(resource._env)
         self.resource = resource
         self.proc = self.env.active_process
 
-        # Parse all kwargs
+        # Setting known kwargs explicitly keeps the attributes dict of requests compact
+        self.user = kwargs.pop('user', None)
+        self.synched_resources = kwargs.pop('synched_resources', None)
+        self.which = kwargs.pop('which', 'all')
+        self.having = kwargs.pop('having', None)
+        self.group = kwargs.pop('group', None)
+        self.blocking = None
+        self.requested_at = kwargs.pop('requested_at', self.env.now)
+        self.arrival = kwargs.pop('arrival', None)
+        if self.arrival is None:
+            self.arrival = resource.rm._next_arrival()
+        self.usage_since = None
+        ticket = kwargs.pop('ticket', None)
+        self._usage_id = -1 if ticket is None else ticket._usage_id
+
+        # Parse other kwargs
         self.__dict__.update(kwargs)
 
         # PUT queueing
@@ -35,24 +60,47 @@ class Request(simpy.resources.base.Put):
         # Callback for triggering GET on this resource
         self.callbacks.append(resource._trigger_get)
 
-        # Callbacks for triggering GET on all resources with queue and not at full
-        # capacity
-        resources_to_trigger = [
-            r for r in resource.rm._store.values()
-            if (len(r.users) < r.capacity) and (len(r.queue) > 0)
-        ]
-        for r in resources_to_trigger:
-            self.callbacks.append(r._trigger_get)
+        # Indexing queueing request
+        resource.rm._enqueue(self)
+        if self.group is not None:
+            self.group.append(self)
 
-        # Triggering PUT on this resource
-        resource.update_usage(self.user, 'Requested')
-        resource._trigger_put(None)
+        # Triggering PUT on this resource. A request taking over from an earlier one
+        # arrived before those queued, so it is granted first
+        if ticket is None:
+            resource.update_usage(self.user, 'Requested', self)
+            resource._trigger_put(None)
+        else:
+            resource._grant_queued(self)
 
     def __exit__(self, exc_type, value, traceback):
         super().__exit__(exc_type, value, traceback)
-        if exc_type is not GeneratorExit:
+        # Requests not granted were withdrawn from the queue instead
+        if exc_type is not GeneratorExit and self.triggered:
             self.resource.release(self)
 
+    def cancel(self):
+        """Withdraw the request from the queue, if not granted yet, recording it
+        as `Dequeued`"""
+        self._withdraw('Dequeued')
+
+    def renege(self):
+        """Withdraw the request from the queue, if not granted yet, recording it
+        as `Reneged`"""
+        if self._withdraw('Reneged'):
+            self.resource.rm._renege(self.user, [self.resource])
+
+    def _withdraw(self, status):
+        """Remove the request from the queue and its indexes, returning whether it
+        was still queueing"""
+        if self.triggered:
+            return False
+        resource = self.resource
+        resource.put_queue.remove(self)
+        resource.update_usage(self.user, status, self)
+        resource.rm._dequeue(self)
+        return True
+
 
 class Release(simpy.resources.base.Get):
     def __init__(self, resource, request):
@@ -75,123 +123,704 @@ class Release(simpy.resources.base.Get):
         # Callback for triggering PUT on this resource
         self.callbacks.append(resource._trigger_put)
 
-        # Callbacks for triggering PUT on all resources with queue and not at full
-        # capacity
-        resources_to_trigger = [
-            r for r in resource.rm._store.values()
-            if (len(r.users) < r.capacity) and (len(r.queue) > 0)
-        ]
-        for r in resources_to_trigger:
-            self.callbacks.append(r._trigger_put)
+        # Callback for triggering PUT only on resources with requests synched
+        # with this resource, which may have become eligible
+        self.callbacks.append(resource.rm._trigger_ready)
 
         # Triggering GET on this resource
-        resource.update_usage(self.user, 'Released')
+        resource.update_usage(self.user, 'Released', request)
         resource._trigger_get(None)
+        resource.rm._set_ready(resource)
+
+
+class RequestQueue:
+    def __init__(self):
+        """Queue of requests in order of arrival, as a linked list indexed by
+        request, so that any request is removed in O(1).
+
+        Removed requests are unlinked lazily: they keep pointing to the request that
+        followed them, so the queue can be iterated while requests are granted or
+        removed along the way.
+
+        Requests are also accessed by position or slice, like in a list, walking the
+        queue from its nearest end.
+        """
+        # Nodes are [previous, next, request], the previous of removed nodes is None
+        self._root = root = []
+        root[:] = [root, root, None]
+        self._nodes = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, request):
+        return request in self._nodes
+
+    def __iter__(self):
+        root = self._root
+        node = root[1]
+        while node is not root:
+            if node[0] is not None:
+                yield node[2]
+            node = node[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        n = len(self._nodes)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('queue index out of range')
+        # Following next links from the start, or previous links from the end
+        root = self._root
+        if index < n // 2:
+            link, steps = 1, index
+        else:
+            link, steps = 0, n - 1 - index
+        node = root[link]
+        for _ in range(steps):
+            node = node[link]
+        return node[2]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)})'
+
+    def append(self, request):
+        root = self._root
+        last = root[0]
+        last[1] = root[0] = self._nodes[request] = [last, root, request]
+
+    def remove(self, request):
+        try:
+            node = self._nodes.pop(request)
+        except KeyError:
+            raise ValueError(f'{request} is not in the queue') from None
+        previous, following, _ = node
+        previous[1] = following
+        following[0] = previous
+        node[0] = None
 
 
 class Resource(simpy.Resource):
+    PutQueue = RequestQueue
     request = simpy.core.BoundClass(Request)
     release = simpy.core.BoundClass(Release)
 
     def __init__(self, rm, name, **kwargs):
         """Base resource class.
 
+        Requests are granted in order of arrival on each resource. Synched requests
+        made together by `user.waits([...])` form a group, which is granted as a
+        whole once all its resources have capacity: the requests on the other
+        resources of the group are granted at once, ahead of requests queued earlier
+        on those resources.
+
         Args:
             rm (:class:`.ResourceManager`): parent resource manager
             name (str): resource name
 
         Keyword Args:
             capacity (int): resource capacity
-            report (bool): create report on resource usage or not
+            report (bool/str): how the usage of the resource is recorded:
+
+                - `True` or `trace`: every change in usage, in `usage`, plus counters
+                - `sample`: users and queue at a fixed interval, in `samples`, plus
+                  counters
+                - `counters`: only counters and time-weighted means, in `counters`
+                - `False`: nothing
+            sample_interval (float): interval between samples, if `report` is `sample`
+            usage_path (str): file where the usage log is streamed to. If not set,
+                it is kept in memory
+            usage_buffer (int): number of usage records kept in memory before
+                streaming them to `usage_path`
         """
         self.rm = rm
         self.name = name
         self.__dict__.update(kwargs)
         self.report = kwargs.get('report', True)
-        self.usage_dict = []
+        if self.report not in REPORT_MODES:
+            raise ValueError(f'report must be one of {REPORT_MODES}')
+        if self.report == 'sample' and 'sample_interval' not in kwargs:
+            raise ValueError('sample_interval must be set to report samples')
+        if self.report == 'sample' and not kwargs['sample_interval'] > 0:
+            raise ValueError('sample_interval must be positive')
+
+        self._trace = self.report in [True, 'trace']
+        self.usage_log = UsageLog(
+            kwargs.get('usage_path', None),
+            kwargs.get('usage_buffer', 100000)
+        )
+        self.usage_counters = UsageCounters(
+            kwargs['sample_interval'] if self.report == 'sample' else None
+        )
         super().__init__(rm.env, kwargs.get('capacity', 1))
 
     @property
     def usage(self):
-        if self.usage_dict:
-            return DataFrame(self.usage_dict)
+        """Usage report rebuilt from the usage log"""
+        return self.usage_log.to_frame()
+
+    @property
+    def usage_dict(self):
+        """Usage records rebuilt from the usage log"""
+        return list(self.usage_log.records())
+
+    @property
+    def counters(self):
+        """Number of requests, grants and releases, time-weighted mean number of
+        users and queueing requests, maximum queue, busy time, utilisation,
+        throughput (releases per unit of time) and waiting time, measured since the
+        first request"""
+        return self.get_counters()
+
+    def get_counters(self, quantiles=()):
+        """
+        Counters of the usage of this resource, including quantiles of the
+        waiting time.
+
+        Args:
+            quantiles (list): quantiles to estimate, between 0 and 1
+
+        Returns:
+            dict
+        """
+        summary = self.usage_counters.summary(self._env.now, quantiles)
+        summary['utilisation'] = summary['mean_users'] / self.capacity
+        return summary
+
+    @property
+    def samples(self):
+        """Number of users and queueing requests sampled at a fixed interval since
+        the first request, if `report` is `sample`"""
+        return self.usage_counters.samples(self._env.now)
+
+    def __setattr__(self, key, value):
+        # Keeping properties indexed in the resource manager up to date
+        rm = self.__dict__.get('rm')
+        if rm is not None and key in rm._properties:
+            old = self.__dict__.get(key)
+            had_key = key in self.__dict__
+            super().__setattr__(key, value)
+            if had_key:
+                rm._unindex_property(self, key, old)
+            rm._index_property(self, key, value)
         else:
-            return DataFrame(columns=['instant', 'user', 'status', 'users', 'queue'])
+            super().__setattr__(key, value)
 
     def _trigger_put(self, get_event):
-        idx = 0
-        while idx < len(self.put_queue):
-            put_event = self.put_queue[idx]
+        if self in self.rm._any_of_by_member:
+            self._trigger_any_of()
+        for put_event in self.put_queue:
+            # Once full, only synched requests of users already using this resource
+            # may be granted
+            if self.count >= self.capacity and not self._users_queueing():
+                break
             self._do_put(put_event)
-            if not put_event.triggered:
-                idx += 1
-            elif self.put_queue.pop(idx) != put_event:
-                raise RuntimeError('Put queue invariant violated')
+            if put_event.triggered:
+                self.put_queue.remove(put_event)
+                self.rm._dequeue(put_event)
+
+    def _trigger_any_of(self):
+        """Serve requests queued on this resource and requests waiting for any of
+        several resources including it, in order of arrival across their queues"""
+        if self.count >= self.capacity:
+            return
+        queues = [q for q in self.rm._any_of_by_member[self] if q.requests]
+        if not queues:
+            return
+        # Requests that can't be granted now stay so in this pass
+        waiting = [q.waiting_for(self) for q in queues]
+        heads = [next(w, None) for w in waiting]
+        pending = (r for r in self.put_queue if self._can_put(r))
+        request = next(pending, None)
+        while self.count < self.capacity:
+            first = None
+            for i, head in enumerate(heads):
+                if head is None:
+                    continue
+                if first is None or head.arrival < heads[first].arrival:
+                    first = i
+            if first is None:
+                # Requests queued on this resource only are served as usual
+                return
+            if request is not None and request.arrival < heads[first].arrival:
+                self._grant_queued(request)
+                request = next(pending, None)
+            else:
+                queues[first].serve(heads[first], self)
+                heads[first] = next(waiting[first], None)
+
+    def _users_queueing(self):
+        """True if any user of this resource is also queueing on it"""
+        queueing = self.rm._queueing
+        return any(self in queueing.get(r.user.name, ()) for r in self.users)
 
     def _do_put(self, event):
         # Nomenclature warning: SimPy users are requests
+        if self._can_put(event):
+            self._grant(event)
+
+    def _can_put(self, event):
+        """True if `event` can be granted now"""
         if event.synched_resources:
-            # Assessing having conditional. True if resource matches required properties.
-            having_condition = True
-            if event.having is not None:
-                for key, value in event.having.items():
-                    having_condition = having_condition * \
-                        (getattr(event.resource, key) == value)
-
-            # Verify if resources have enough capacity, excluding processes of this user
-            simpy_users = [
-                r.users for r in event.synched_resources
-            ]
-            this_user_processes = [
-                len([s for s in u if s.user == event.user])
-                for u in simpy_users
-            ]
-            resources_available = [
-                len(r.users) < (r.capacity + s)
-                for r, s in zip(event.synched_resources, this_user_processes)
-            ]
-
-            # Get chronon users of all requests using any of the synched resources
-            chronon_users = [
-                u.user for u in list(chain.from_iterable(simpy_users))
-            ]
-
-            if (event.which == 'all'
-                    and all(resources_available)
-                    and having_condition):
-                self.users.append(event)
-                event.usage_since = self._env.now
-                event.succeed()
-                self.update_usage(event.user, 'Using')
-            elif (event.which == 'any'
-                    and event.user not in chronon_users
-                    and event.resource.count < event.resource.capacity
-                    and having_condition):
-                self.users.append(event)
-                event.usage_since = self._env.now
-                event.succeed()
-                self.update_usage(event.user, 'Using')
-                # Remove this user from queues in other resources
-                user_queues = self.rm.get_resources(by_user_queueing=event.user.name)
-                event.user.releases([r.name for r in user_queues if r is not self])
-                [r.update_usage(event.user, 'Unqueued') for r in user_queues if r is not self]
+            return self._synched_available(event) and self._matches(event.having)
+        return len(self.users) < self.capacity
 
-        else:
-            if len(self.users) < self.capacity:
-                self.users.append(event)
-                event.usage_since = self._env.now
-                event.succeed()
-                self.update_usage(event.user, 'Using')
-
-    def update_usage(self, user, status):
-        """Update usage information"""
+    def _matches(self, having):
+        """True if the resource matches required properties"""
+        if having is None:
+            return True
+        return all(getattr(self, key) == value for key, value in having.items())
+
+    def _synched_available(self, event):
+        """True if all synched resources have enough capacity, excluding requests
+        of the user of `event`"""
+        holdings = self.rm._using.get(event.user.name, {})
+
+        # The resource lacking capacity last time is likely to still lack it
+        r = event.blocking
+        if r is not None and r.count >= r.capacity + len(holdings.get(r, ())):
+            return False
+
+        for r in event.synched_resources:
+            if r.count >= r.capacity + len(holdings.get(r, ())):
+                event.blocking = r
+                return False
+        return True
+
+    def _grant(self, event):
+        self.users.append(event)
+        event.usage_since = self._env.now
         if self.report:
-            users = [r.user.name for r in self.users]
-            queue = [r.user.name for r in self.queue if r not in self.users]
-            self.usage_dict.append({
-                'instant': user.humanise(self._env.now),
-                'user': user.name,
-                'status': status,
-                'users': users,
-                'queue': queue
-            })
+            self.usage_counters.record_wait(event.usage_since - event.requested_at)
+        event.succeed()
+        self.update_usage(event.user, 'Using', event)
+        self.rm._use(event)
+
+        # Granting the other requests of the group at once, as their resources have
+        # just been checked
+        if event.group is not None:
+            for request in event.group:
+                if not request.triggered and request.resource is not self:
+                    request.resource._grant_queued(request)
+
+    def _grant_queued(self, event):
+        self._do_put(event)
+        if event.triggered:
+            self.put_queue.remove(event)
+            self.rm._dequeue(event)
+
+    def _do_get(self, event):
+        try:
+            self.users.remove(event.request)
+            self.rm._unuse(event.request)
+        except ValueError:
+            pass
+        event.succeed()
+
+    def update_usage(self, user, status, request=None):
+        """Update usage information
+
+        Args:
+            user (:class:`.User`)
+            status (str)
+            request (:class:`.Request`): request changing the occupation of the resource
+        """
+        if self.report:
+            self.usage_counters.record(self._env.now, status)
+            if self._trace:
+                self.usage_log.record(self._env.now, user, status, request)
+
+
+class AnyOfRequest(simpy.Event):
+    def __init__(self, queue, user, having=None):
+        """Request usage of any resource of an :class:`.AnyOfQueue`. The event is
+        triggered once a :class:`.Request` on one of them is granted, which is
+        then available as `request`.
+
+        Args:
+            queue (:class:`.AnyOfQueue`): queue of the candidate resources
+            user (:class:`.User`): user putting the request
+            having (dict): properties that should match a specific value in the resource
+
+        Attributes:
+            resource (:class:`.Resource`): resource granted, None until then
+            request (:class:`.Request`): request on the resource granted
+            tickets (dict): :class:`._Ticket` of the request in the usage of each
+                candidate, while waiting
+        """
+        super().__init__(queue.rm.env)
+        self.queue = queue
+        self.user = user
+        self.having = having
+        self.resource = None
+        self.request = None
+        self.requested_at = self.env.now
+        self.arrival = queue.rm._next_arrival()
+        self.tickets = {}
+        queue.put(self)
+
+    def renege(self):
+        """Withdraw the request, if not granted yet"""
+        if self.triggered:
+            return
+        if self.request is None:
+            self.queue.cancel(self, 'Reneged')
+            self.queue.rm._renege(self.user, self.queue.members)
+        else:
+            # Waiting on the resource chosen, whose capacity was taken meanwhile
+            self.request.renege()
+
+
+class _Ticket:
+    __slots__ = ('_usage_id',)
+
+    def __init__(self):
+        """Place of an :class:`.AnyOfRequest` in the usage of one of its candidates,
+        identifying it in the records of the candidate."""
+        self._usage_id = -1
+
+
+class AnyOfQueue:
+    def __init__(self, rm, resources):
+        """Single queue of the requests for any of a list of resources.
+
+        Instead of queueing on every candidate, requests wait here and are granted
+        the first candidate with free capacity matching their properties, if the
+        user is not using any candidate yet. Whenever a candidate frees capacity, it
+        is granted in order of arrival to the requests waiting here, in other queues
+        of requests for any of several resources including it, and queued on the
+        candidate itself.
+
+        Waiting requests are still reported as queueing on every candidate: they
+        are recorded as `Requested` in the usage of each of them, and indexed as
+        queueing by the resource manager. Once granted a candidate, they are
+        recorded as `Unqueued` on the others.
+
+        Args:
+            rm (:class:`.ResourceManager`): parent resource manager
+            resources (list): candidate :class:`.Resource`, in order of preference
+
+        Attributes:
+            members (dict): candidate resources, kept as an ordered set
+            requests (:class:`.RequestQueue`): waiting :class:`.AnyOfRequest`
+        """
+        self.rm = rm
+        self.members = dict.fromkeys(resources)
+        self.requests = RequestQueue()
+
+    def _is_free_for(self, resource, request):
+        if resource.count >= resource.capacity:
+            return False
+        if request.having is not None:
+            return all(
+                getattr(resource, key) == value for key, value in request.having.items()
+            )
+        return True
+
+    def _is_using_member(self, user):
+        return any(r in self.members for r in self.rm._using.get(user.name, ()))
+
+    def put(self, request):
+        """Grant the first free candidate to `request`, or make it wait"""
+        if not self._is_using_member(request.user):
+            for resource in self.members:
+                if self._is_free_for(resource, request):
+                    self._grant(request, resource)
+                    return
+        self.requests.append(request)
+        self.rm._wait_any_of(request)
+        for resource in self.members:
+            request.tickets[resource] = ticket = _Ticket()
+            resource.update_usage(request.user, 'Requested', ticket)
+
+    def cancel(self, request, status='Dequeued'):
+        """Remove a waiting request from the queue, recording `status` in the usage
+        of every candidate"""
+        self._unwait(request)
+        for resource, ticket in request.tickets.items():
+            resource.update_usage(request.user, status, ticket)
+        request.tickets = {}
+
+    def _unwait(self, request):
+        self.requests.remove(request)
+        self.rm._unwait_any_of(request)
+
+    def waiting_for(self, resource):
+        """Yield the waiting requests `resource` can be granted to, in order of
+        arrival"""
+        for request in self.requests:
+            if (self._is_free_for(resource, request)
+                    and not self._is_using_member(request.user)):
+                yield request
+
+    def serve(self, request, resource):
+        """Grant `resource` to a waiting request"""
+        self._unwait(request)
+        self._grant(request, resource)
+
+        # The request leaves the queues of the other candidates
+        for r, ticket in request.tickets.items():
+            if r is not resource:
+                r.update_usage(request.user, 'Dequeued', ticket)
+                r.update_usage(request.user, 'Unqueued', ticket)
+        request.tickets = {}
+
+    def _grant(self, request, resource):
+        request.resource = resource
+        request.request = resource.request(
+            user=request.user,
+            having=request.having,
+            requested_at=request.requested_at,
+            ticket=request.tickets.get(resource),
+            arrival=request.arrival
+        )
+        if request.request.triggered:
+            request.succeed(request.request.value)
+        else:
+            # Capacity was taken by requests queued on the resource itself
+            request.request.callbacks.append(lambda e: request.succeed(e.value))
+
+
+# Placeholder of attributes not set for a unit
+_MISSING = object()
+
+
+class PoolUnit:
+    def __init__(self, pool, name, **kwargs):
+        """Unit of a :class:`.ResourcePool`. Its attributes can be changed along the
+        simulation (e.g. `unit.station = 'B'`), keeping the pool index up to date.
+
+        Args:
+            pool (:class:`.ResourcePool`): parent pool
+            name (str): unit name
+            **kwargs: Arbitrary keyword arguments, set as attributes
+        """
+        self.pool = pool
+        self.name = name
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name} of {self.pool.name}>'
+
+    def __setattr__(self, key, value):
+        pool = self.__dict__.get('pool')
+        if pool is not None and self in pool._free:
+            pool._unindex_unit(self)
+            super().__setattr__(key, value)
+            pool._index_unit(self)
+            # Waiting requests may match the new value
+            pool._trigger_put(None)
+        else:
+            super().__setattr__(key, value)
+
+
+class _PoolQueue(RequestQueue):
+    def __init__(self):
+        """Put queue of a :class:`.ResourcePool`, also grouping requests with the
+        same properties and synched resources, in order of arrival.
+
+        Attributes:
+            groups (dict): requests of each group, kept as an ordered set
+            keys (dict): group of each request
+            seq (dict): order of arrival of each request
+        """
+        super().__init__()
+        self.groups = {}
+        self.keys = {}
+        self.seq = {}
+        self._n = 0
+
+    def append(self, request):
+        super().append(request)
+        try:
+            key = (
+                tuple(request.having.items()) if request.having else (),
+                tuple(request.synched_resources or ())
+            )
+            hash(key)
+        except TypeError:
+            # Requests with unhashable properties are grouped on their own
+            key = request
+        self.groups.setdefault(key, {})[request] = None
+        self.keys[request] = key
+        self.seq[request] = self._n
+        self._n += 1
+
+    def remove(self, request):
+        super().remove(request)
+        key = self.keys.pop(request)
+        del self.seq[request]
+        group = self.groups[key]
+        del group[request]
+        if not group:
+            del self.groups[key]
+
+
+class ResourcePool(Resource):
+    PutQueue = _PoolQueue
+
+    def __init__(self, rm, name, **kwargs):
+        """Resource made of many homogeneous units, each used by one request at a
+        time. Requests are granted a free unit matching their `having` properties,
+        found in an index of free units by attribute value instead of checking
+        every unit.
+
+        The unit granted is available in the `unit` attribute of the request.
+
+        Args:
+            rm (:class:`.ResourceManager`): parent resource manager
+            name (str): pool name
+
+        Keyword Args:
+            units (list): dicts with the `name` and other attributes of each unit
+            custom_unit (:class:): Custom unit class
+            report (bool): create report on pool usage or not
+            usage_path (str): file where the usage log is streamed to. If not set,
+                it is kept in memory
+            usage_buffer (int): number of usage records kept in memory before
+                streaming them to `usage_path`
+
+        Attributes:
+            units (dict): units of the pool, by name
+        """
+        units = kwargs.pop('units', [])
+        UnitClass = kwargs.pop('custom_unit', PoolUnit)
+        kwargs['capacity'] = len(units)
+        super().__init__(rm, name, **kwargs)
+
+        # Free units, kept as an ordered set and indexed by attribute and value
+        self._free = {}
+        self._free_index = {}
+        self.units = {}
+        for attributes in units:
+            unit = UnitClass(self, **attributes)
+            self.units[unit.name] = unit
+            self._free[unit] = None
+            self._index_unit(unit)
+
+    def get_unit(self, name):
+        """
+        Get unit by name.
+
+        Args:
+            name (str)
+
+        Returns:
+            :class:`.PoolUnit`
+        """
+        return self.units[name]
+
+    def get_units(self, **kwargs):
+        """
+        Get units by condition.
+
+        Keyword Args:
+            by_user (str/:class:`.User`): user using the units
+            by_properties (dict): dictionary with desired units properties values
+            free (bool): if True, only free units
+
+        Returns:
+            list: :class:`.PoolUnit`
+        """
+        by_user = kwargs.get('by_user', None)
+        by_properties = kwargs.get('by_properties', {})
+
+        if by_user is not None:
+            name = getattr(by_user, 'name', by_user)
+            units = [r.unit for r in self.users if r.user.name == name]
+        elif kwargs.get('free', False):
+            units = self._free
+        else:
+            units = self.units.values()
+
+        return [
+            u for u in units
+            if all(getattr(u, key, _MISSING) == value for key, value in by_properties.items())
+        ]
+
+    def _index_unit(self, unit):
+        for key, value in unit.__dict__.items():
+            if key == 'pool':
+                continue
+            try:
+                self._free_index.setdefault(key, {}).setdefault(value, {})[unit] = None
+            except TypeError:
+                # Unhashable values are looked up by scanning free units
+                pass
+
+    def _unindex_unit(self, unit):
+        for key, value in unit.__dict__.items():
+            if key == 'pool':
+                continue
+            try:
+                units = self._free_index[key][value]
+            except (KeyError, TypeError):
+                continue
+            del units[unit]
+            if not units:
+                del self._free_index[key][value]
+
+    def _find_unit(self, having):
+        """First free unit matching `having`, if any"""
+        if not having:
+            return next(iter(self._free), None)
+
+        try:
+            candidates = sorted([
+                self._free_index.get(key, {}).get(value, {})
+                for key, value in having.items()
+            ], key=len)
+        except TypeError:
+            candidates = [self._free]
+
+        for unit in candidates[0]:
+            if all(getattr(unit, key, _MISSING) == value for key, value in having.items()):
+                return unit
+        return None
+
+    def _trigger_put(self, get_event):
+        if self in self.rm._any_of_by_member:
+            self._trigger_any_of()
+        # Requests of a group are granted in order, so only the first request of
+        # each group is assessed. A group without free units stays so in this pass.
+        queue = self.put_queue
+        unavailable = set()
+        while self._free:
+            heads = sorted(
+                (queue.seq[next(iter(group))], next(iter(group)))
+                for key, group in queue.groups.items() if key not in unavailable
+            )
+            for _, put_event in heads:
+                self._do_put(put_event)
+                if put_event.triggered:
+                    queue.remove(put_event)
+                    self.rm._dequeue(put_event)
+                    break
+                unavailable.add(queue.keys[put_event])
+            else:
+                return
+
+    def _can_put(self, event):
+        if self._find_unit(event.having) is None:
+            return False
+        return not event.synched_resources or self._synched_available(event)
+
+    def _do_put(self, event):
+        unit = self._find_unit(event.having)
+        if unit is None:
+            return
+        if event.synched_resources and not self._synched_available(event):
+            return
+        event.unit = unit
+        self._unindex_unit(unit)
+        del self._free[unit]
+        self._grant(event)
+
+    def _do_get(self, event):
+        if event.request in self.users:
+            unit = event.request.unit
+            self._free[unit] = None
+            self._index_unit(unit)
+        super()._do_get(event)
@@ -0,0 +1,140 @@
+import math
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.01):
+        """Streaming sketch of the quantiles of non-negative values.
+
+        Values are counted in buckets of exponentially growing width, so quantiles
+        are estimated within `relative_accuracy` of their actual value, while the
+        number of buckets only grows with the logarithm of the range of values,
+        not with the number of values.
+
+        Args:
+            relative_accuracy (float)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._zeros = 0
+        self._buckets = {}
+
+    def add(self, value):
+        """Count a value"""
+        self.count += 1
+        if value <= 0:
+            self._zeros += 1
+        else:
+            bucket = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def quantile(self, q):
+        """Estimate of the `q` quantile, or NaN if no value was counted
+
+        Args:
+            q (float): between 0 and 1
+        """
+        if self.count == 0:
+            return math.nan
+        # Rounding up to the next value, as waiting times are mostly looked at in
+        # their upper quantiles
+        rank = math.ceil(q * (self.count - 1))
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if rank < seen:
+                return 2 * self._gamma ** bucket / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+class StreamingStats:
+    def __init__(self, relative_accuracy=0.01):
+        """Count, mean, extremes and quantiles of a stream of non-negative values,
+        in constant memory.
+
+        Args:
+            relative_accuracy (float): accuracy of the quantiles
+
+        Attributes:
+            count (int)
+            total (float)
+            min (float)
+            max (float)
+            sketch (:class:`.QuantileSketch`)
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min = math.nan
+        self.max = math.nan
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        """Count a value"""
+        if self.count == 0:
+            self.min = self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+        self.sketch.add(value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """Estimate of the `q` quantile, or NaN if no value was counted"""
+        return self.sketch.quantile(q)
+
+    def summary(self, prefix, quantiles=()):
+        """Mean, maximum and quantiles as a dict, with keys starting by `prefix`
+
+        Args:
+            prefix (str)
+            quantiles (list): quantiles to estimate, between 0 and 1
+        """
+        summary = {f'mean_{prefix}': self.mean, f'max_{prefix}': self.max}
+        for q in quantiles:
+            summary[f'{prefix}_p{100 * q:g}'] = self.quantile(q)
+        return summary
+
+
+class ProcessStats:
+    def __init__(self):
+        """Statistics of the users going through a process, updated online.
+
+        Attributes:
+            entries (int): number of users entering the process
+            completions (int): number of users completing the process
+            durations (:class:`.StreamingStats`): time taken to complete the process
+            waits (dict): :class:`.StreamingStats` of the time waited for each
+                resource, by resource name
+        """
+        self.entries = 0
+        self.completions = 0
+        self.durations = StreamingStats()
+        self.waits = {}
+
+    def enter(self):
+        self.entries += 1
+
+    def complete(self, duration):
+        self.completions += 1
+        self.durations.add(duration)
+
+    def watch(self, requests, env):
+        """Record the time waited for `requests` once granted"""
+        since = env.now
+        for request in requests:
+            request.callbacks.append(
+                lambda event: self._record_wait(event.resource.name, env.now - since)
+            )
+
+    def _record_wait(self, resource, wait):
+        if resource not in self.waits:
+            self.waits[resource] = StreamingStats()
+        self.waits[resource].add(wait)
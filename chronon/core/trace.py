@@ -0,0 +1,380 @@
+import csv
+import os
+from bisect import bisect_right
+from datetime import datetime
+from pandas import DataFrame, concat, read_csv
+from .usage import USAGE_COLUMNS, _Occupation
+from .checkpoint import CHECKPOINT_COLUMNS
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TRACE_FORMATS = ['parquet', 'arrow', 'csv']
+
+# Columns of the records of each table, with their Arrow types
+_TABLES = {
+    'usage': [
+        ('resource', 'string'),
+        ('instant', 'float64'),
+        ('user', 'string'),
+        ('status', 'string'),
+        ('request', 'int64'),
+        ('datetime', 'bool'),
+    ],
+    'checkpoints': [
+        ('user', 'string'),
+        ('instant', 'float64'),
+        ('info', 'string'),
+        ('datetime', 'bool'),
+    ],
+}
+
+
+def _default_format():
+    return 'parquet' if pyarrow is not None else 'csv'
+
+
+def _csv_path(path, table):
+    return os.path.join(path, f'{table}.csv')
+
+
+def _part_path(path, table, trace_format, part):
+    return os.path.join(path, table, f'part-{part:06d}.{trace_format}')
+
+
+def _skip(batches, n):
+    """Yield `batches` without their first `n` records"""
+    for batch in batches:
+        if n >= len(batch):
+            n -= len(batch)
+            continue
+        yield batch.iloc[n:].reset_index(drop=True)
+        n = 0
+
+
+def _usage_rows(batches, resource=None):
+    """Yield (resource, instant, user, status, request, datetime) records of
+    `batches`"""
+    for batch in batches:
+        if resource is not None:
+            batch = batch[batch['resource'] == resource]
+        yield from zip(*(batch[c] for c, _ in _TABLES['usage']))
+
+
+def _int_instants(frame):
+    """Report instants as ints if all of them are whole numbers, as in-memory logs
+    do, since they are stored as floats"""
+    instants = frame['instant']
+    if len(instants) and instants.dtype.kind == 'f' and (instants % 1 == 0).all():
+        frame = frame.assign(instant=instants.astype('int64'))
+    return frame
+
+
+def _replay_usage(rows, occupation):
+    """Usage records with users and queue snapshots, updating `occupation`"""
+    records = []
+    for _, instant, user, status, request, is_datetime in rows:
+        if occupation.apply(status, (request, user)):
+            records.append({
+                'instant': datetime.fromtimestamp(instant) if is_datetime else instant,
+                'user': user,
+                'status': status,
+                'users': [u for _, u in occupation.users],
+                'queue': [u for _, u in occupation.queue]
+            })
+    return _int_instants(DataFrame(records, columns=USAGE_COLUMNS))
+
+
+def _checkpoints_frame(batches):
+    frame = concat(
+        [DataFrame(columns=[c for c, _ in _TABLES['checkpoints']]), *batches],
+        ignore_index=True
+    )
+    if frame['datetime'].any():
+        frame = frame.assign(instant=[
+            datetime.fromtimestamp(i) if d else i
+            for i, d in zip(frame['instant'], frame['datetime'])
+        ])
+    else:
+        frame = _int_instants(frame.astype({'instant': 'float64'}))
+    return frame[CHECKPOINT_COLUMNS]
+
+
+def _guess_format(path):
+    if os.path.exists(_csv_path(path, 'usage')):
+        return 'csv'
+    for table in _TABLES:
+        for part in os.listdir(os.path.join(path, table)):
+            return os.path.splitext(part)[1][1:]
+    return _default_format()
+
+
+class TraceSink:
+    def __init__(self, path, **kwargs):
+        """Sink of usage and checkpoint records, written to files in columnar
+        batches while the simulation runs, so that they are not kept in memory.
+
+        Records of each table (`usage` and `checkpoints`) are written to the `path`
+        directory, as a sequence of Parquet or Arrow IPC files of one batch each if
+        `pyarrow` is installed, or as a CSV file otherwise. Records still buffered
+        are written at the end of each run of the :class:`.EventManager`, or by
+        :meth:`flush`. Traces are read with :class:`.TraceReader`, also while the
+        simulation is running.
+
+        Args:
+            path (str): directory of the trace files, created if needed
+
+        Keyword Args:
+            format (str): `parquet`, `arrow` or `csv`. If not set, `parquet` if
+                `pyarrow` is installed, `csv` otherwise
+            batch_size (int): number of records of each table buffered before
+                writing them
+        """
+        self.path = path
+        self.format = kwargs.get('format', None) or _default_format()
+        self.batch_size = kwargs.get('batch_size', 100000)
+        if self.format not in TRACE_FORMATS:
+            raise ValueError(f'format must be one of {TRACE_FORMATS}')
+        if self.format != 'csv' and pyarrow is None:
+            raise ImportError(f'pyarrow is required to write {self.format} traces')
+
+        self._buffers = {t: {c: [] for c, _ in columns} for t, columns in _TABLES.items()}
+        self._parts = dict.fromkeys(_TABLES, 0)
+        # Number of records written, and position and offset (part number or CSV
+        # file offset) of each batch written, by table
+        self._n_written = dict.fromkeys(_TABLES, 0)
+        self._batch_positions = {t: [] for t in _TABLES}
+        self._batch_offsets = {t: [] for t in _TABLES}
+
+        # Tables are created empty, so that they can be read before any record
+        os.makedirs(path, exist_ok=True)
+        for table, columns in _TABLES.items():
+            if self.format == 'csv':
+                with open(_csv_path(path, table), 'w', newline='') as f:
+                    csv.writer(f).writerow([c for c, _ in columns])
+            else:
+                os.makedirs(os.path.join(path, table), exist_ok=True)
+
+    def record_usage(self, resource, instant, user, status, request):
+        """Buffer a usage record"""
+        self._append('usage', (
+            resource, instant, user.name, status, request,
+            isinstance(user.instant, datetime)
+        ))
+
+    def record_checkpoint(self, instant, user, info):
+        """Buffer a checkpoint"""
+        self._append('checkpoints', (
+            user.name, instant, str(info), isinstance(user.instant, datetime)
+        ))
+
+    def _append(self, table, values):
+        buffer = self._buffers[table]
+        for column, value in zip(buffer.values(), values):
+            column.append(value)
+        if len(buffer['instant']) >= self.batch_size:
+            self._write(table)
+
+    def _write(self, table):
+        buffer = self._buffers[table]
+        if not buffer['instant']:
+            return
+
+        self._batch_positions[table].append(self._n_written[table])
+        self._n_written[table] += len(buffer['instant'])
+        if self.format == 'csv':
+            path = _csv_path(self.path, table)
+            self._batch_offsets[table].append(os.path.getsize(path))
+            with open(path, 'a', newline='') as f:
+                csv.writer(f).writerows(zip(*buffer.values()))
+        else:
+            self._batch_offsets[table].append(self._parts[table])
+            schema = pyarrow.schema([
+                (c, pyarrow.type_for_alias(t)) for c, t in _TABLES[table]
+            ])
+            batch = pyarrow.RecordBatch.from_pydict(buffer, schema=schema)
+            path = _part_path(self.path, table, self.format, self._parts[table])
+            if self.format == 'parquet':
+                pyarrow.parquet.write_table(pyarrow.Table.from_batches([batch]), path)
+            else:
+                with pyarrow.ipc.new_file(path, schema) as writer:
+                    writer.write_batch(batch)
+            self._parts[table] += 1
+
+        for column in buffer.values():
+            column.clear()
+
+    def flush(self):
+        """Write all buffered records"""
+        for table in _TABLES:
+            self._write(table)
+
+    def reader(self):
+        """:class:`.TraceReader` of the records recorded so far"""
+        self.flush()
+        return TraceReader(self.path, format=self.format)
+
+    def n_records(self, table):
+        """Number of records of `table` recorded so far
+
+        Args:
+            table (str): `usage` or `checkpoints`
+        """
+        return self._n_written[table] + len(self._buffers[table]['instant'])
+
+    def batches(self, table, start=0):
+        """Yield the records of `table` from position `start` on as data frames,
+        reading only the files from the batch that contains it.
+
+        Args:
+            table (str): `usage` or `checkpoints`
+            start (int): number of records to skip, e.g. those already read
+        """
+        self.flush()
+        if start >= self._n_written[table]:
+            return
+        batch = bisect_right(self._batch_positions[table], start) - 1
+        batches = self.reader().batches(table, self._batch_offsets[table][batch])
+        yield from _skip(batches, start - self._batch_positions[table][batch])
+
+    def get_checkpoints_from(self, start):
+        """Checkpoints from position `start` on, in a data frame
+
+        Args:
+            start (int): number of checkpoints to skip, e.g. those already read
+        """
+        return _checkpoints_frame(self.batches('checkpoints', start))
+
+    def get_usage_from(self, resource, start, occupation):
+        """Usage of a resource from position `start` of the usage records on.
+
+        Args:
+            resource (str): name of the resource
+            start (int): number of usage records to skip, of all resources
+            occupation (:class:`._Occupation`): users and queue before `start`,
+                updated with the records read
+
+        Returns:
+            DataFrame
+        """
+        return _replay_usage(_usage_rows(self.batches('usage', start), resource), occupation)
+
+
+class TraceReader:
+    def __init__(self, path, **kwargs):
+        """Lazy reader of traces written by a :class:`.TraceSink`. Records are read
+        in batches, so that only the records requested are loaded in memory.
+
+        Args:
+            path (str): directory of the trace files
+
+        Keyword Args:
+            format (str): `parquet`, `arrow` or `csv`. If not set, it is guessed
+                from the files in `path`
+            batch_size (int): number of records read at once from CSV files
+        """
+        self.path = path
+        self.format = kwargs.get('format', None) or _guess_format(path)
+        self.batch_size = kwargs.get('batch_size', 100000)
+
+    def batches(self, table, offset=0):
+        """Yield the records of `table` as data frames, one per batch
+
+        Args:
+            table (str): `usage` or `checkpoints`
+            offset (int): number of the first file part to read, or offset in the
+                CSV file of the first record to read
+        """
+        if self.format == 'csv':
+            dtypes = {c: 'str' for c, t in _TABLES[table] if t == 'string'}
+            with open(_csv_path(self.path, table), 'rb') as f:
+                header = 0
+                if offset:
+                    f.seek(offset)
+                    header = None
+                yield from read_csv(
+                    f,
+                    header=header,
+                    names=[c for c, _ in _TABLES[table]],
+                    dtype=dtypes,
+                    chunksize=self.batch_size,
+                    keep_default_na=False
+                )
+            return
+
+        directory = os.path.join(self.path, table)
+        for part in sorted(os.listdir(directory))[offset:]:
+            path = os.path.join(directory, part)
+            if self.format == 'parquet':
+                yield pyarrow.parquet.read_table(path).to_pandas()
+            else:
+                with pyarrow.ipc.open_file(path) as reader:
+                    yield reader.read_all().to_pandas()
+
+    def get_checkpoints(self, user=None, start=None, end=None):
+        """
+        Checkpoints, optionally filtered.
+
+        Args:
+            user (str): name of the user
+            start (float): minimum instant
+            end (float): maximum instant
+
+        Returns:
+            DataFrame
+        """
+        frames = []
+        for batch in self.batches('checkpoints'):
+            if user is not None:
+                batch = batch[batch['user'] == user]
+            if start is not None:
+                batch = batch[batch['instant'] >= start]
+            if end is not None:
+                batch = batch[batch['instant'] <= end]
+            frames.append(batch)
+        return _checkpoints_frame(frames)
+
+    def get_usage(self, resource):
+        """
+        Usage of a resource, with users and queue snapshots.
+
+        Args:
+            resource (str): name of the resource
+
+        Returns:
+            DataFrame
+        """
+        return _replay_usage(_usage_rows(self.batches('usage'), resource), _Occupation())
+
+    def get_states(self, instants):
+        """
+        Users and queue of each resource reported by the last record up to each of
+        the `instants`, reading the usage once for all of them.
+
+        Args:
+            instants (list): target instants
+
+        Returns:
+            list: dicts of tuples of users names and queueing users names by
+            resource, one per instant
+        """
+        states = [None] * len(instants)
+        occupations = {}
+        records = _usage_rows(self.batches('usage'))
+        pending = next(records, None)
+        for i in sorted(range(len(instants)), key=lambda i: instants[i]):
+            while pending is not None and pending[1] <= instants[i]:
+                resource, _, user, status, request, _ = pending
+                if resource not in occupations:
+                    occupations[resource] = _Occupation()
+                occupations[resource].apply(status, (request, user))
+                pending = next(records, None)
+            states[i] = {
+                r: ([u for _, u in o.users], [u for _, u in o.queue])
+                for r, o in occupations.items()
+            }
+        return states
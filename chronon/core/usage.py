@@ -0,0 +1,478 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from pandas import DataFrame
+from .stats import StreamingStats
+
+# Statuses which change the occupation of a resource
+REQUESTED = 'Requested'
+USING = 'Using'
+RELEASED = 'Released'
+# Silent removal of a request from the queue, used to rebuild queues but not reported
+DEQUEUED = 'Dequeued'
+# Withdrawal of a request from the queue once the patience of its user expires
+RENEGED = 'Reneged'
+
+USAGE_COLUMNS = ['instant', 'user', 'status', 'users', 'queue']
+
+
+class _Occupation:
+    def __init__(self, users=(), queue=(), released=None):
+        """Users and queue of a resource, as ordered sets of (request, user) ids.
+
+        Changes are applied following the reporting of the usage records: a released
+        request still shows up as user in its own record and dequeued requests only
+        disappear from the queue in the next reported record.
+        """
+        self.users = dict.fromkeys(users)
+        self.queue = dict.fromkeys(queue)
+        self.released = released
+        self.dequeued = []
+
+    def apply(self, status, key):
+        """Apply a record, returning whether it is reported or not."""
+        if status == DEQUEUED:
+            self.dequeued.append(key)
+            return False
+        for k in self.dequeued:
+            self.queue.pop(k, None)
+        self.dequeued = []
+        if self.released is not None:
+            self.users.pop(self.released, None)
+            self.released = None
+
+        if status == REQUESTED:
+            self.queue[key] = None
+        elif status == USING:
+            self.queue.pop(key, None)
+            self.users[key] = None
+        elif status == RELEASED:
+            self.released = key
+        elif status == RENEGED:
+            self.queue.pop(key, None)
+        return True
+
+    def snapshot(self):
+        return tuple(self.users), tuple(self.queue), self.released
+
+
+class UsageLog:
+    def __init__(self, path=None, buffer_size=100000, snapshot_interval=1000):
+        """Columnar, append-only log of the usage of a resource.
+
+        Instead of storing a snapshot of users and queue at each record, only the
+        change in occupation is stored, in typed arrays with interned users and
+        statuses. Snapshots are rebuilt by replaying the log, starting from the
+        closest of the periodic snapshots when queried at a given instant.
+
+        Args:
+            path (str): if set, records are streamed to this file in chunks
+            buffer_size (int): number of records kept in memory before flushing
+                them to `path`
+            snapshot_interval (int): minimum number of records between snapshots
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.snapshot_interval = snapshot_interval
+        # Users are interned by name, keeping whether their instants are datetimes
+        self.users = []
+        self._user_datetimes = array('b')
+        self.statuses = [REQUESTED, USING, RELEASED, DEQUEUED, RENEGED]
+        self._user_ids = {}
+        self._status_ids = {s: i for i, s in enumerate(self.statuses)}
+        self._n_requests = 0
+        # Instants are stored as floats, but reported as ints if all of them are
+        self._int_instants = True
+
+        # Current occupation and periodic snapshots of it
+        self._occupation = _Occupation()
+        self._snapshot_instants = []
+        self._snapshot_positions = []
+        self._snapshots = []
+
+        # Position and file offset of chunks flushed to `path`
+        self._n_flushed = 0
+        self._chunk_positions = []
+        self._chunk_offsets = []
+        self._reset_buffer()
+        if self.path is not None:
+            open(self.path, 'wb').close()
+
+        # Trace sink records are streamed to instead, if set
+        self.sink = None
+        self.name = None
+
+    def __len__(self):
+        return self._n_flushed + len(self._instant)
+
+    def _reset_buffer(self):
+        self._instant = array('d')
+        self._status = array('h')
+        self._user = array('i')
+        self._request = array('q')
+
+    def _intern_user(self, user):
+        if user.name not in self._user_ids:
+            self._user_ids[user.name] = len(self.users)
+            self.users.append(user.name)
+            self._user_datetimes.append(isinstance(user.instant, datetime))
+        return self._user_ids[user.name]
+
+    def _intern_status(self, status):
+        if status not in self._status_ids:
+            self._status_ids[status] = len(self.statuses)
+            self.statuses.append(status)
+        return self._status_ids[status]
+
+    def stream_to(self, sink, name):
+        """Stream further records to a trace sink instead of keeping them.
+
+        Args:
+            sink (:class:`.TraceSink`)
+            name (str): name of the resource in the trace
+        """
+        self.sink = sink
+        self.name = name
+
+    def record(self, instant, user, status, request=None):
+        """Append a record.
+
+        Args:
+            instant (float): simulation time
+            user (:class:`.User`)
+            status (str)
+            request (:class:`.Request`): request whose state changed, if any
+        """
+        if status == REQUESTED:
+            request._usage_id = self._n_requests
+            self._n_requests += 1
+        r = request._usage_id if request is not None else -1
+        if self.sink is not None:
+            self.sink.record_usage(self.name, instant, user, status, r)
+            return
+        u = self._intern_user(user)
+        if self._int_instants and not isinstance(instant, int):
+            self._int_instants = False
+        self._instant.append(instant)
+        self._status.append(self._intern_status(status))
+        self._user.append(u)
+        self._request.append(r)
+
+        position = len(self) - 1
+        reported = self._occupation.apply(status, (r, u))
+        last_snapshot = self._snapshot_positions[-1] if self._snapshots else 0
+        if reported and position - last_snapshot >= self.snapshot_interval:
+            self._snapshot_instants.append(instant)
+            self._snapshot_positions.append(position)
+            self._snapshots.append(self._occupation.snapshot())
+
+        if self.path is not None and len(self._instant) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to `path`."""
+        if self.path is None or not self._instant:
+            return
+        with open(self.path, 'ab') as f:
+            self._chunk_positions.append(self._n_flushed)
+            self._chunk_offsets.append(f.tell())
+            array('q', [len(self._instant)]).tofile(f)
+            for column in (self._instant, self._status, self._user, self._request):
+                column.tofile(f)
+        self._n_flushed += len(self._instant)
+        self._reset_buffer()
+
+    def _read(self, start=0):
+        """Yield (instant, status, user, request) records from position `start`."""
+        if start < self._n_flushed:
+            chunk = bisect_right(self._chunk_positions, start) - 1
+            with open(self.path, 'rb') as f:
+                f.seek(self._chunk_offsets[chunk])
+                for position in self._chunk_positions[chunk:]:
+                    size = array('q')
+                    size.fromfile(f, 1)
+                    columns = [array(t) for t in 'dhiq']
+                    for column in columns:
+                        column.fromfile(f, size[0])
+                    yield from self._rows(columns, start - position)
+        columns = (self._instant, self._status, self._user, self._request)
+        yield from self._rows(columns, start - self._n_flushed)
+
+    @staticmethod
+    def _rows(columns, skip):
+        instants, statuses, user_ids, request_ids = columns
+        for i in range(max(skip, 0), len(instants)):
+            yield instants[i], statuses[i], user_ids[i], request_ids[i]
+
+    def _names(self, keys):
+        return [self.users[u] for _, u in keys]
+
+    def records(self):
+        """Replay the log, yielding records with users and queue snapshots."""
+        if self.sink is not None:
+            yield from self.to_frame().to_dict('records')
+            return
+        yield from self._replay(0, _Occupation())
+
+    def _replay(self, start, occupation):
+        """Replay the log from position `start`, updating `occupation`."""
+        for instant, s, u, r in self._read(start):
+            status = self.statuses[s]
+            if occupation.apply(status, (r, u)):
+                if self._user_datetimes[u]:
+                    instant = datetime.fromtimestamp(instant)
+                elif self._int_instants:
+                    instant = int(instant)
+                yield {
+                    'instant': instant,
+                    'user': self.users[u],
+                    'status': status,
+                    'users': self._names(occupation.users),
+                    'queue': self._names(occupation.queue)
+                }
+
+    def to_frame(self):
+        """Rebuild the usage data frame."""
+        if self.sink is not None:
+            return self.sink.reader().get_usage(self.name)
+        return _to_frame(list(self.records()))
+
+    def state_at(self, at):
+        """Users and queue reported by the last record up to instant `at`.
+
+        Args:
+            at (float): target instant
+
+        Returns:
+            tuple: list of users names and list of queueing users names
+        """
+        return self.states_at([at])[0]
+
+    def states_at(self, instants):
+        """Users and queue reported by the last record up to each of the `instants`,
+        replaying the log once for all of them.
+
+        Args:
+            instants (list): target instants
+
+        Returns:
+            list: tuples of users names and queueing users names, one per instant
+        """
+        if self.sink is not None:
+            return [
+                s.get(self.name, ([], [])) for s in self.sink.reader().get_states(instants)
+            ]
+
+        states = [None] * len(instants)
+        occupation = _Occupation()
+        position = 0
+        records = None
+        pending = None
+        for i in sorted(range(len(instants)), key=lambda i: instants[i]):
+            at = instants[i]
+
+            # Jump to the closest snapshot if it is ahead of the current position
+            s = bisect_right(self._snapshot_instants, at) - 1
+            if s >= 0 and self._snapshot_positions[s] >= position:
+                occupation = _Occupation(*self._snapshots[s])
+                position = self._snapshot_positions[s] + 1
+                records = None
+                pending = None
+
+            # Replay records up to the target instant, keeping the first record
+            # beyond it for the next instants
+            if records is None:
+                records = self._read(position)
+            while True:
+                if pending is None:
+                    pending = next(records, None)
+                if pending is None or pending[0] > at:
+                    break
+                instant, status, u, r = pending
+                occupation.apply(self.statuses[status], (r, u))
+                position += 1
+                pending = None
+
+            states[i] = self._names(occupation.users), self._names(occupation.queue)
+        return states
+
+
+def _to_frame(records):
+    if records:
+        return DataFrame(records)
+    else:
+        return DataFrame(columns=USAGE_COLUMNS)
+
+
+class UsageCursor:
+    def __init__(self, log):
+        """Reader of the records appended to a :class:`.UsageLog` since the last
+        read, replaying each record once.
+
+        Args:
+            log (:class:`.UsageLog`)
+
+        Attributes:
+            position (int): number of records read, or of usage records of all
+                resources in the trace if the log is streamed to a trace sink
+        """
+        self.log = log
+        self.position = 0
+        self._occupation = _Occupation()
+
+    def read(self):
+        """Usage records appended since the last read, as a data frame"""
+        sink = self.log.sink
+        if sink is not None:
+            frame = sink.get_usage_from(self.log.name, self.position, self._occupation)
+            self.position = sink.n_records('usage')
+            return frame
+        records = list(self.log._replay(self.position, self._occupation))
+        self.position = len(self.log)
+        return _to_frame(records)
+
+
+# Change in the number of users and queueing requests caused by each status
+_OCCUPATION_CHANGES = {
+    REQUESTED: (0, 1),
+    USING: (1, -1),
+    RELEASED: (-1, 0),
+    DEQUEUED: (0, -1),
+    RENEGED: (0, -1),
+}
+
+SAMPLE_COLUMNS = ['instant', 'users', 'queue']
+
+
+class UsageCounters:
+    def __init__(self, sample_interval=None):
+        """Counters of the usage of a resource, updated online.
+
+        The number of users and queueing requests are integrated over time, from the
+        first record on, keeping their time-weighted means without storing the
+        records themselves. Optionally, they are also sampled at a fixed interval.
+
+        Args:
+            sample_interval (float): if set, interval between samples
+
+        Attributes:
+            users (int): current number of users
+            queue (int): current number of queueing requests
+            max_queue (int): maximum number of requests left queueing at an instant,
+                once the records of the instant are applied
+            counts (dict): number of records of each status
+            waits (:class:`.StreamingStats`): time waited by requests until granted
+        """
+        self.sample_interval = sample_interval
+        self.users = 0
+        self.queue = 0
+        self.max_queue = 0
+        self.counts = dict.fromkeys(_OCCUPATION_CHANGES, 0)
+        self.waits = StreamingStats()
+        self.start = None
+        self._last = None
+        self._users_area = 0.0
+        self._queue_area = 0.0
+        self._busy_time = 0.0
+        self._next_sample = None
+        self._sample_instant = array('d')
+        self._sample_users = array('q')
+        self._sample_queue = array('q')
+
+    def record(self, instant, status):
+        """Apply a usage record.
+
+        Args:
+            instant (float): simulation time
+            status (str)
+        """
+        if status not in _OCCUPATION_CHANGES:
+            return
+        if self.start is None:
+            self.start = self._last = instant
+            self._next_sample = instant
+        self._sample(instant)
+
+        elapsed = instant - self._last
+        if elapsed:
+            # Requests granted at the instant they were made never queued
+            self.max_queue = max(self.max_queue, self.queue)
+        self._users_area += self.users * elapsed
+        self._queue_area += self.queue * elapsed
+        if self.users:
+            self._busy_time += elapsed
+        self._last = instant
+
+        users, queue = _OCCUPATION_CHANGES[status]
+        self.users += users
+        self.queue += queue
+        self.counts[status] += 1
+
+    def record_wait(self, wait):
+        """Count the time waited by a request until granted"""
+        self.waits.add(wait)
+
+    def _sample(self, instant):
+        """Take the samples due before `instant`, as the occupation is constant
+        since the last record"""
+        if self.sample_interval is None:
+            return
+        while self._next_sample < instant:
+            self._sample_instant.append(self._next_sample)
+            self._sample_users.append(self.users)
+            self._sample_queue.append(self.queue)
+            self._next_sample += self.sample_interval
+
+    def summary(self, now, quantiles=()):
+        """Counters, time-weighted means and waiting times up to `now`.
+
+        Args:
+            now (float): simulation time
+            quantiles (list): quantiles of the waiting time to estimate
+
+        Returns:
+            dict
+        """
+        elapsed = 0 if self.start is None else now - self.start
+        users_area = self._users_area
+        queue_area = self._queue_area
+        busy_time = self._busy_time
+        if self._last is not None:
+            users_area += self.users * (now - self._last)
+            queue_area += self.queue * (now - self._last)
+            if self.users:
+                busy_time += now - self._last
+        return {
+            'requests': self.counts[REQUESTED],
+            'grants': self.counts[USING],
+            'releases': self.counts[RELEASED],
+            'reneges': self.counts[RENEGED],
+            'mean_users': users_area / elapsed if elapsed > 0 else 0.0,
+            'mean_queue': queue_area / elapsed if elapsed > 0 else 0.0,
+            'max_queue': max(self.max_queue, self.queue),
+            'busy_time': busy_time,
+            'throughput': self.counts[RELEASED] / elapsed if elapsed > 0 else 0.0,
+            **self.waits.summary('wait', quantiles),
+        }
+
+    def samples(self, now):
+        """Samples up to `now` as a data frame.
+
+        Args:
+            now (float): simulation time
+        """
+        instants = list(self._sample_instant)
+        users = list(self._sample_users)
+        queue = list(self._sample_queue)
+        if self.sample_interval is not None and self._next_sample is not None:
+            # Samples due after the last record, without changing the counters
+            instant = self._next_sample
+            while instant <= now:
+                instants.append(instant)
+                users.append(self.users)
+                queue.append(self.queue)
+                instant += self.sample_interval
+        return DataFrame(
+            {'instant': instants, 'users': users, 'queue': queue},
+            columns=SAMPLE_COLUMNS
+        )
@@ -1,49 +1,26 @@
-import simpy
 import numpy as np
 from datetime import datetime, timedelta
+from simpy.events import Timeout
 from ..helpers.time import parse_time
-from .resource import Resource
+from .resource import Resource, AnyOfRequest
 
 
-class User:
-    def __init__(self, um, pm, name, **kwargs):
-        """
-        Args:
-            um (:class:`.UserManager`)
-            pm (:class:`.ProcessManager`)
-            name (str)
-            **kwargs: Arbitrary keyword arguments
+# Types of durations waited for as a bare timeout
+_DELAY_TYPES = frozenset([int, float])
 
-        Keyword Args:
-            instant (float/datetime): Instant when user enters the simulation.
-                If not set, starts at 0.
-            initial_process (str): Process in which the user enters the simulation.
-                If not set, starts at flow's initial_process.
 
-        Attributes:
-            checkpoints (DataFrame): Report of occurence of key instants for this user
-            env (:class:`simpy.Environment`): Environment linked to this manager
-            pm (:class:`.ProcessManager`): :class:`.ProcessManager` linked to this manager
-            rm (:class:`.ResourceManager`): :class:`.ResourceManager` linked to this manager
-        """
-        self.pm = pm
-        self.um = um
-        self.env = self.pm.env
-        self.rm = self.pm.rm
-        self.name = name
-        self.__dict__.update(kwargs)
-        self.instant = kwargs.get('instant', 0)
-        self.initial_process = kwargs.get('initial_process', 'initial')
-        self.checkpoints = []
+class BaseUser:
+    """Base class for users, implementing their behaviour in the simulation.
 
-    def set_attributes(self, **kwargs):
-        """
-        Set user attributes
+    Subclasses must provide the `um`, `pm`, `env`, `rm`, `name`, `instant` and
+    `initial_process` attributes.
+    """
+    __slots__ = ()
 
-        Args:
-            **kwargs: Arbitrary keyword arguments
-        """
-        self.__dict__.update(kwargs)
+    @property
+    def checkpoints(self):
+        """Checkpoints of this user, as a list of dicts with `instant` and `info`"""
+        return self.um.checkpoint_log.get_records(user=self.name)
 
     def set_checkpoint(self, info):
         """
@@ -52,32 +29,29 @@ class User:
         Args:
             name (str): identifier of this checkpoint
         """
-        self.checkpoints.append({'instant': self.humanise(self.env.now), 'info': info})
+        self.um.checkpoint_log.record(self.env.now, self, info)
 
     def run(self):
         """Assemble timeline of events for a user."""
-        yield self.pm.env.timeout(parse_time(self.instant))
+        yield self.env.timeout(max(parse_time(self.instant) - self.env.now, 0))
         process = self.initial_process
 
         # Getting process being pointed by the initial tag
         if process == 'initial':
-            process = self.pm.flow[self.pm.flow['from'] == process]['to'].values
-            if len(process) > 1:
-                raise ValueError(f'Next process is not uniquely defined: {process}')
-            else:
-                process = process[0]
+            process = self.pm.next_process(process)
 
         # Iterating processes
         while process != 'final':
             process_obj = self.pm.get_process(process)
-            yield self.env.process(process_obj.definition(self))
-            next_process = self.pm.flow[self.pm.flow['from'] == process]['to'].values
-            if len(next_process) > 1:
-                raise ValueError(
-                    f'Next process is not uniquely defined: {next_process}')
-            else:
-                next_process = next_process[0]
-            process = next_process
+            process_obj.stats.enter()
+            entered = self.env.now
+            running = self.env.process(process_obj.definition(self))
+            self.pm._running[running] = process_obj
+            yield running
+            del self.pm._running[running]
+            process_obj.stats.complete(self.env.now - entered)
+            process = self.pm.next_process(process)
+        self.rm._reneged.pop(self.name, None)
 
     def requests(self, resources, **kwargs):
         """Make user request resources.
@@ -90,10 +64,12 @@ class User:
             having (dict): properties that should match a specific value in the resources
 
         Returns:
-            :class:`simpy.Request`: list of requests
+            :class:`simpy.Request`: list of requests, or a single
+            :class:`.AnyOfRequest` for `any` of several resources
         """
         which = kwargs.get('which', 'all')
         having = kwargs.get('having', None)
+        self.rm._reneged.pop(self.name, None)
 
         if not isinstance(resources, list):
             resources = [resources]
@@ -102,24 +78,31 @@ class User:
         if isinstance(resources[0], str):
             resources = [self.rm.get_resource(r) for r in resources]
 
-        # Requests won't occupy a resource before all synched resources are available
+        # A single request waits for the first free resource, instead of queueing
+        # on each of them
+        if which == 'any' and len(resources) > 1:
+            queue = self.rm.get_any_of_queue(resources)
+            return [AnyOfRequest(queue, self, having)]
+
+        # Requests won't occupy a resource before all synched resources are available,
+        # and are then granted at once
         if len(resources) > 1:
             synched_resources = resources
+            group = []
         else:
             synched_resources = None
-
-        requests = []
-        for r in resources:
-            # If `any` stop making requests as soon as it gets access to a resource
-            if which != 'any' or len(self.rm.get_resources(by_user=self.name)) == 0:
-                request = r.request(
-                    user=self,
-                    synched_resources=synched_resources,
-                    which=which,
-                    having=having
-                )
-                requests.append(request)
-        return requests
+            group = None
+
+        return [
+            r.request(
+                user=self,
+                synched_resources=synched_resources,
+                which=which,
+                having=having,
+                group=group
+            )
+            for r in resources
+        ]
 
     def releases(self, resources):
         """Make user release resources.
@@ -135,20 +118,37 @@ class User:
         if len(resources) > 0 and isinstance(resources[0], str):
             resources = [self.rm.get_resource(r) for r in resources]
 
+        # Requests for any of several resources, cancelled by releasing any of them
+        waiting_any_of = list(self.rm._waiting_any_of.get(self.name, ()))
+        cancelled = []
+
+        # Handles of the requests of this user, by resource
+        using = self.rm._using.get(self.name, {})
+        queueing = self.rm._queueing.get(self.name, {})
+
         for res in resources:
-            # Releasing requests made by this user
-            request_using = [
-                req for req in res.users
-                if req.user == self
-            ]
+            request_using = list(using.get(res, ()))
+            # Requests for any of several resources queue on each of them
             request_queueing = [
-                req for req in res.queue
-                if req.user == self
+                req for req in queueing.get(res, ())
+                if not isinstance(req, AnyOfRequest)
+            ]
+            request_any_of = [
+                req for req in waiting_any_of
+                if res in req.queue.members
             ]
             if len(request_using) == 1:
                 res.release(request_using[0])
             elif len(request_queueing) == 1:
-                res.put_queue.remove(request_queueing[0])
+                request_queueing[0].cancel()
+            elif request_any_of:
+                for req in request_any_of:
+                    if req not in cancelled:
+                        req.queue.cancel(req)
+                        cancelled.append(req)
+            elif self.rm._unrenege(self, res):
+                # Already withdrawn when the patience expired
+                pass
             else:
                 raise ValueError(
                     f'User {self.name} is not using or queueing on \
@@ -166,34 +166,40 @@ class User:
 
         Keyword Args:
             patience (float/:class:`datetime.timedelta`): maximum time user waits
-                for obtaining the resources
+                for obtaining the resources. Once it expires, requests not granted
+                yet are withdrawn from the queues, recorded as `Reneged`
             which (string): `all` or `any` resources in the list
             having (dict): properties that should match a specific value in the resources
+
+        Returns:
+            :class:`simpy.Event`: a bare timeout for durations without patience,
+            resulting in `None`, or a condition on the duration or the resources (and
+            the patience), resulting in a :class:`simpy.events.ConditionValue`
         """
+        # Pure delays are the most common steps, waited for without any condition
+        if type(something) in _DELAY_TYPES and 'patience' not in kwargs:
+            return Timeout(self.env, something)
+
         patience = kwargs.get('patience', 'unlimited')
         which = kwargs.get('which', 'all')
         having = kwargs.get('having', None)
 
         numbers = (int, float, np.int64, np.float64, datetime, timedelta)
 
-        # Patience
-        if isinstance(patience, numbers):
-            waits_patience = self.env.timeout(parse_time(patience))
-        elif patience == 'unlimited':
-            # Creating an event that never will be triggered, aiming to make
-            # waits_patience neutral
-            waits_patience = simpy.Event(self.env)
-        else:
+        if not isinstance(patience, numbers) and patience != 'unlimited':
             raise ValueError('Patience must be a number or datetime object')
 
         # Timeout
         if isinstance(something, numbers):
-            waits_time_or_resources = self.env.all_of(
-                [self.env.timeout(parse_time(something))]
-            )
+            waits_time_or_resources = self.env.timeout(parse_time(something))
+            requests = []
         # Resources
         elif isinstance(something, (list, str, Resource)):
             requests = self.requests(something, which=which, having=having)
+            # Waiting times are recorded by the process waiting for the resources
+            process = self.pm._running.get(self.env.active_process)
+            if process is not None:
+                process.stats.watch(requests, self.env)
             if which == 'all':
                 waits_time_or_resources = self.env.all_of(requests)
             elif which == 'any':
@@ -201,8 +207,23 @@ class User:
         else:
             raise ValueError('Users can only wait for time or resources')
 
+        # Patience, only waited for if set
+        if patience == 'unlimited':
+            return waits_time_or_resources
+        waits_patience = self.env.timeout(parse_time(patience))
+        if requests:
+            # Reneging before the process resumes
+            waits_patience.callbacks.append(lambda _: self._renege(requests))
         return waits_time_or_resources | waits_patience
 
+    @staticmethod
+    def _renege(requests):
+        """Withdraw the requests not granted once the patience expires"""
+        if all(r.triggered for r in requests):
+            return
+        for r in requests:
+            r.renege()
+
     def humanise(self, time):
         """Humanise datetime"""
         if isinstance(self.instant, datetime):
@@ -216,3 +237,200 @@ class User:
         Shortcut to Event Manager get_user
         """
         return self.um.get_user(name)
+
+
+class User(BaseUser):
+    def __init__(self, um, pm, name, **kwargs):
+        """
+        Args:
+            um (:class:`.UserManager`)
+            pm (:class:`.ProcessManager`)
+            name (str)
+            **kwargs: Arbitrary keyword arguments
+
+        Keyword Args:
+            instant (float/datetime): Instant when user enters the simulation.
+                If not set, starts at 0.
+            initial_process (str): Process in which the user enters the simulation.
+                If not set, starts at flow's initial_process.
+
+        Attributes:
+            checkpoints (DataFrame): Report of occurence of key instants for this user
+            env (:class:`simpy.Environment`): Environment linked to this manager
+            pm (:class:`.ProcessManager`): :class:`.ProcessManager` linked to this manager
+            rm (:class:`.ResourceManager`): :class:`.ResourceManager` linked to this manager
+        """
+        self.pm = pm
+        self.um = um
+        self.env = self.pm.env
+        self.rm = self.pm.rm
+        self.name = name
+        self.__dict__.update(kwargs)
+        self.instant = kwargs.get('instant', 0)
+        self.initial_process = kwargs.get('initial_process', 'initial')
+
+    def set_attributes(self, **kwargs):
+        """
+        Set user attributes
+
+        Args:
+            **kwargs: Arbitrary keyword arguments
+        """
+        self.__dict__.update(kwargs)
+
+
+# Placeholder of attributes not set for a user
+_MISSING = object()
+
+
+class UserTable:
+    def __init__(self):
+        """Columnar storage of the attributes of users of the same type.
+
+        Attributes:
+            columns (dict): list of values of each attribute, one per row
+        """
+        self.columns = {}
+        self._n_rows = 0
+        self._free_rows = []
+
+    def add_row(self, attributes):
+        """Add a row, reusing rows of removed users.
+
+        Args:
+            attributes (dict)
+
+        Returns:
+            int: row index
+        """
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = self._n_rows
+            self._n_rows += 1
+            for column in self.columns.values():
+                column.append(_MISSING)
+        for key, value in attributes.items():
+            self.set(row, key, value)
+        return row
+
+    def add_rows(self, columns, n_rows):
+        """Add rows at once from columns of values, e.g. arrays.
+
+        Args:
+            columns (dict): sequence of `n_rows` values of each attribute
+            n_rows (int)
+
+        Returns:
+            range: row indexes
+        """
+        # Arrays and series are converted to Python values in a single pass
+        columns = {
+            key: values.tolist() if hasattr(values, 'tolist') else list(values)
+            for key, values in columns.items()
+        }
+        for key, values in columns.items():
+            if len(values) != n_rows:
+                raise ValueError(f'Column {key} has {len(values)} values, not {n_rows}')
+
+        rows = range(self._n_rows, self._n_rows + n_rows)
+        for key, column in self.columns.items():
+            if key not in columns:
+                column.extend([_MISSING] * n_rows)
+        for key, values in columns.items():
+            self.columns.setdefault(key, [_MISSING] * self._n_rows).extend(values)
+        self._n_rows += n_rows
+        return rows
+
+    def remove_row(self, row):
+        for column in self.columns.values():
+            column[row] = _MISSING
+        self._free_rows.append(row)
+
+    def get(self, row, key):
+        value = self.columns[key][row]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def set(self, row, key, value):
+        if key not in self.columns:
+            self.columns[key] = [_MISSING] * self._n_rows
+        self.columns[key][row] = value
+
+
+class CompactUser(BaseUser):
+    __slots__ = ('um', 'name', '_row')
+
+    def __init__(self, um, pm, name, **kwargs):
+        """Memory efficient user, for simulations with many users.
+        Can be used instead of :class:`.User` by setting it as `custom_user`, or
+        extended as a custom user.
+
+        Only the user manager and name are stored in the object. Other attributes
+        are stored in columns shared by all users of the same class, and accessed
+        as usual (e.g. `user.some_attribute`).
+
+        Args:
+            um (:class:`.UserManager`)
+            pm (:class:`.ProcessManager`)
+            name (str)
+            **kwargs: Arbitrary keyword arguments
+
+        Keyword Args:
+            instant (float/datetime): Instant when user enters the simulation.
+                If not set, starts at 0.
+            initial_process (str): Process in which the user enters the simulation.
+                If not set, starts at flow's initial_process.
+        """
+        object.__setattr__(self, 'um', um)
+        object.__setattr__(self, 'name', name)
+        kwargs.setdefault('instant', 0)
+        kwargs.setdefault('initial_process', 'initial')
+        object.__setattr__(self, '_row', um.get_user_table(type(self)).add_row(kwargs))
+
+    @classmethod
+    def _from_row(cls, um, name, row):
+        """User whose attributes are already in a row of the table of its class."""
+        user = object.__new__(cls)
+        object.__setattr__(user, 'um', um)
+        object.__setattr__(user, 'name', name)
+        object.__setattr__(user, '_row', row)
+        return user
+
+    @property
+    def pm(self):
+        return self.um.pm
+
+    @property
+    def env(self):
+        return self.um.pm.env
+
+    @property
+    def rm(self):
+        return self.um.pm.rm
+
+    def __getattr__(self, key):
+        if key in CompactUser.__slots__:
+            raise AttributeError(key)
+        try:
+            return self.um.get_user_table(type(self)).get(self._row, key)
+        except KeyError:
+            raise AttributeError(
+                f'{type(self).__name__} {self.name} has no attribute {key}') from None
+
+    def __setattr__(self, key, value):
+        if key in CompactUser.__slots__:
+            object.__setattr__(self, key, value)
+        else:
+            self.um.get_user_table(type(self)).set(self._row, key, value)
+
+    def set_attributes(self, **kwargs):
+        """
+        Set user attributes
+
+        Args:
+            **kwargs: Arbitrary keyword arguments
+        """
+        for key, value in kwargs.items():
+            setattr(self, key, value)
@@ -0,0 +1,84 @@
+import os
+from contextlib import closing
+from pandas import read_csv
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ARRIVAL_FORMATS = ['csv', 'parquet']
+
+
+def generate_arrivals(interarrival, n=None, prefix='user_', start=0, **kwargs):
+    """Generate arrivals separated by inter-arrival times.
+
+    The first user arrives one inter-arrival time after `start`.
+
+    Args:
+        interarrival (float/callable): time between consecutive arrivals, or function
+            without arguments returning it (e.g. sampling a distribution)
+        n (int): number of arrivals. If not set, arrivals are generated endlessly
+        prefix (str): prefix of the names of users, followed by their number
+        start (float): instant from which arrivals are generated
+        **kwargs: Arbitrary keyword arguments shared by all users
+
+    Yields:
+        dict: `name`, `instant` and keyword arguments of each user
+    """
+    instant = start
+    i = 0
+    while n is None or i < n:
+        instant += interarrival() if callable(interarrival) else interarrival
+        yield {'name': f'{prefix}{i}', 'instant': instant, **kwargs}
+        i += 1
+
+
+def read_arrivals(path, chunk_size=10000, **kwargs):
+    """Read arrivals from a CSV or Parquet file, one chunk of rows at a time.
+
+    Rows must be sorted by `instant`. As arrivals are consumed by
+    :meth:`.EventManager.create_arrivals` when the simulation reaches them, a chunk is
+    only read once the previous one has entered the simulation, so that memory is
+    bounded by the size of the chunks rather than of the file.
+
+    Args:
+        path (str): file with a `name` column, and optionally `instant`,
+            `initial_process` and any other attribute of the users
+        chunk_size (int): number of rows read at once
+        **kwargs: Arbitrary keyword arguments shared by all users
+
+    Keyword Args:
+        format (str): `csv` or `parquet`. If not set, it is guessed from the extension
+            of the file
+
+    Returns:
+        iterator: dicts with the `name`, `instant` and keyword arguments of each user
+    """
+    arrival_format = kwargs.pop('format', None) or _guess_format(path)
+    if arrival_format not in ARRIVAL_FORMATS:
+        raise ValueError(f'format must be one of {ARRIVAL_FORMATS}')
+    if arrival_format == 'parquet' and pyarrow is None:
+        raise ImportError('pyarrow is required to read parquet arrivals')
+    return _read_chunks(path, arrival_format, chunk_size, kwargs)
+
+
+def _read_chunks(path, arrival_format, chunk_size, shared):
+    """Arrivals of the consecutive chunks of rows of a file."""
+    if arrival_format == 'parquet':
+        chunks = (
+            batch.to_pandas()
+            for batch in pyarrow.parquet.ParquetFile(path).iter_batches(chunk_size)
+        )
+    else:
+        chunks = read_csv(path, chunksize=chunk_size)
+
+    with closing(chunks):
+        for chunk in chunks:
+            for arrival in chunk.to_dict('records'):
+                yield {**shared, **arrival}
+
+
+def _guess_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return 'parquet' if extension in ('parquet', 'pq') else 'csv'
@@ -1,5 +1,6 @@
 # flake8: noqa
 from .event_manager import *
 from .process_manager import *
+from .replication_manager import *
 from .resource_manager import *
 from .user_manager import *
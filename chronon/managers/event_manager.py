@@ -1,9 +1,49 @@
-from pandas import DataFrame
+import multiprocessing
+import os
+import traceback
+from pandas import DataFrame, concat
+from simpy.core import EmptySchedule
+from simpy.events import URGENT, Event
 from ..core.manager import Manager
+from ..core.profiler import Profiler
+from ..core.usage import USAGE_COLUMNS, UsageCursor
 from .user_manager import UserManager
 from ..helpers.time import parse_time
 
 
+def _run_branch(em, branch, connection):
+    """Run a branch in a forked process, sending back its result, or its exception
+    and traceback."""
+    try:
+        message = True, branch(em), None
+    except BaseException as e:
+        message = False, e, traceback.format_exc()
+    try:
+        connection.send(message)
+    except Exception:
+        # Result or exception can't be pickled, so only the traceback is sent
+        connection.send((False, None, (message[2] or '') + traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def _receive_branch(name, process, connection):
+    """Result of a branch running in `process`, raising its exception if it failed"""
+    try:
+        ok, result, trace = connection.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(
+            f'Branch {name} exited with code {process.exitcode} before sending results'
+        )
+    process.join()
+    if ok:
+        return result
+    if result is None:
+        raise RuntimeError(f'Branch {name} failed:\n{trace}')
+    raise result
+
+
 class EventManager(Manager):
     def __init__(self, pm, **kwargs):
         """
@@ -14,16 +54,31 @@ class EventManager(Manager):
 
         Keyword Args:
             um (:class:`.UserManager`): If not set, a new :class:`.UserManager` is created
+            trace (:class:`.TraceSink`): If set, usage and checkpoint records are
+                streamed to it while running, instead of being kept in memory
 
         Attributes:
             events (dict_keys): All events attached to this manager
             pm (:class:`.ProcessManager`): :class:`.ProcessManager` linked to this manager
+            profiler (:class:`.Profiler`): timings of the runs made with `profile`, if any
+            trace (:class:`.TraceSink`): sink of usage and checkpoint records, if any
             um (:class:`.UserManager`): :class:`.UserManager` linked to this manager
         """
         self.pm = pm
         super().__init__()
         self.um = kwargs.get('um', UserManager(pm))
         self.events = self._store.keys()
+        self.trace = kwargs.get('trace', None)
+        self.profiler = None
+
+        # Users already entering the simulation, with their processes, by name, and
+        # arrival sources yet to be started
+        self._started = {}
+        self._arrivals = []
+
+        # Checkpoints and usage already read by get_new_checkpoints and get_new_usage
+        self._checkpoints_read = 0
+        self._usage_cursors = {}
 
         # Setting flow for trivial one-process simulations
         if len(self.pm._store) == 1:
@@ -42,6 +97,21 @@ class EventManager(Manager):
         """
         return self.um.create_user(name, **kwargs)
 
+    def create_users(self, table, **kwargs):
+        """
+        Shortcut for `create_users` method in :class:`.UserManager`.
+
+        Users replacing others that already left the simulation enter it in the
+        next run. Users still in the simulation can't be replaced.
+        """
+        running = [
+            name for name in table['name']
+            if name in self._started and self._started[name][1].is_alive
+        ]
+        if running:
+            raise ValueError(f'Users still in the simulation cannot be replaced: {running}')
+        return self.um.create_users(table, **kwargs)
+
     def set_user(self, name, **kwargs):
         """
         Shortcut for `set_user` method in :class:`.UserManager`.
@@ -69,47 +139,414 @@ class EventManager(Manager):
         """
         return self.um.get_user(name)
 
+    def create_arrivals(self, arrivals, **kwargs):
+        """
+        Add a source of users, created lazily just before they enter the simulation.
+
+        Args:
+            arrivals (iterable): keyword arguments for `create_user` of each user,
+                as dicts with a `name` and sorted by `instant`. See
+                :func:`.generate_arrivals`.
+
+        Keyword Args:
+            keep_users (bool): keep users in the :class:`.UserManager` once they
+                leave the simulation. If not set, they are removed, keeping their
+                checkpoints.
+        """
+        self._arrivals.append((arrivals, kwargs.get('keep_users', False)))
+
+    def _feed(self, arrivals, keep_users):
+        """Create users from an arrival source as the simulation reaches them."""
+        env = self.pm.env
+        for arrival in arrivals:
+            arrival = dict(arrival)
+            name = arrival.pop('name')
+            instant = parse_time(arrival.get('instant', 0))
+            if instant < env.now:
+                raise ValueError(f'Arrivals must be sorted by instant: {name}')
+            elif instant > env.now:
+                yield env.timeout(instant - env.now)
+            user = self.um.create_user(name, **arrival)
+            self._started[name] = user, env.process(self._enter(user, keep_users))
+
+    def _enter(self, user, keep_users):
+        """Run user and remove it from the simulation once it leaves."""
+        yield from user.run()
+        if not keep_users:
+            self.um.remove_user(user.name)
+            self._started.pop(user.name, None)
+
     def run(self, **kwargs):
         """
         Create user processes and run simulation.
+
+        Keyword Args:
+            until (float/datetime): instant at which the simulation stops
+            profile (bool): time the processing of events and the resources hot
+                methods along the run, accumulated in :attr:`profiler`
+        """
+        profile = kwargs.pop('profile', False)
+        self._start()
+        env = self.pm.env
+
+        # The run is stopped by an event of its own, which can then be discarded
+        # whether SimPy leaves it scheduled to resume the run (as from 4.1) or not
+        stop = None
+        if 'until' in kwargs and not isinstance(kwargs['until'], Event):
+            until = parse_time(kwargs['until'])
+            if until <= env.now:
+                raise ValueError(
+                    f'until ({until}) must be greater than the current simulation time')
+            # Scheduled before any other event at `until`, as SimPy does
+            stop = Event(env)
+            stop._ok = True
+            stop._value = None
+            env.schedule(stop, URGENT, until - env.now)
+            kwargs['until'] = stop
+
+        # Instrumentation is only in place while profiling
+        if profile:
+            if self.profiler is None:
+                self.profiler = Profiler(self.pm)
+            self.profiler.attach()
+        try:
+            env.run(**kwargs)
+        finally:
+            if profile:
+                self.profiler.detach()
+            self._flush_trace()
+
+        # A stop event left scheduled has no callbacks, and is the next event
+        if stop is not None and stop.callbacks is not None:
+            env.step()
+
+    def _start(self):
+        """Start the processes of new users and arrival sources."""
+        for user in self.um._take_new_users():
+            # Users from arrival sources were started as they were created
+            started = self._started.get(user.name)
+            if started is None or started[0] is not user:
+                self._started[user.name] = user, self.pm.env.process(user.run())
+        for arrivals, keep_users in self._arrivals:
+            self.pm.env.process(self._feed(iter(arrivals), keep_users))
+        self._arrivals = []
+
+        # Resources may have been created after this manager
+        if self.trace is not None:
+            self.um.checkpoint_log.stream_to(self.trace)
+            for r in self.pm.rm.resources:
+                self.pm.get_resource(r).usage_log.stream_to(self.trace, r)
+
+    def run_until(self, until, **kwargs):
         """
-        for user_name, user_object in self.um._store.items():
-            self.pm.env.process(user_object.run())
-        if 'until' in kwargs:
-            kwargs['until'] = parse_time(kwargs['until'])
-        self.pm.env.run(**kwargs)
+        Run the simulation up to an instant, which can be resumed later on.
+        Nothing is run if the simulation is already at or beyond `until`.
+
+        Args:
+            until (float/datetime): instant at which the simulation stops
+
+        Keyword Args:
+            profile (bool): time the processing of events, see :meth:`run`
+        """
+        until = parse_time(until)
+        if until > self.pm.env.now:
+            self.run(until=until, **kwargs)
+        else:
+            self._start()
+
+    def step(self, n_events=1):
+        """
+        Process the next events of the simulation.
+
+        Args:
+            n_events (int): number of events to process
+
+        Returns:
+            int: number of events processed, fewer than `n_events` if the
+            simulation finished
+        """
+        self._start()
+        env = self.pm.env
+        try:
+            for n in range(n_events):
+                try:
+                    env.step()
+                except EmptySchedule:
+                    return n
+            return n_events
+        finally:
+            self._flush_trace()
+
+    def _flush_trace(self):
+        """Write the records buffered by the trace sink, so that runs leave the trace
+        files complete."""
+        if self.trace is not None:
+            self.trace.flush()
+
+    def run_chunks(self, interval=None, n_events=None, until=None):
+        """
+        Run the simulation in chunks, yielding after each of them so that results
+        can be read incrementally (see :meth:`get_new_checkpoints` and
+        :meth:`get_new_usage`), or the simulation stopped early.
+
+        Args:
+            interval (float/timedelta): simulated time of each chunk
+            n_events (int): number of events of each chunk, if `interval` is not set
+            until (float/datetime): instant at which the simulation stops. If not
+                set, it runs until there are no more events
+
+        Yields:
+            float: current simulation time
+        """
+        if (interval is None) == (n_events is None):
+            raise ValueError('Either interval or n_events must be set')
+        env = self.pm.env
+        until = float('inf') if until is None else parse_time(until)
+        self._start()
+        while env.now < until and env.peek() < float('inf'):
+            if interval is not None:
+                self.run_until(min(env.now + parse_time(interval), until))
+            else:
+                for _ in range(n_events):
+                    if env.peek() >= until:
+                        break
+                    env.step()
+                # The clock reaches `until` even if there are no events at it
+                if until < float('inf') and env.peek() >= until:
+                    self.run_until(until)
+                self._flush_trace()
+            yield env.now
+
+    def fork(self, branches, **kwargs):
+        """
+        Continue the simulation from its current state in several branches, e.g.
+        what-if scenarios sharing a warm-up period, which is then run only once.
+
+        Each branch runs in a forked process, with a copy of the whole simulation:
+        clock, scheduled events, resources holdings and queues, users in their
+        processes, and recorded usage, checkpoints and statistics. Random number
+        generators are copied as well, so all branches start from the same random
+        state. This simulation is left unchanged.
+
+        Args:
+            branches (dict): function of each branch by name, which receives the copy
+                of this :class:`.EventManager`, e.g. to change users or resources
+                and run it, and returns the results of the branch. Results must be
+                picklable. If a branch fails, the others are stopped and its
+                exception is raised. If its result or exception can't be pickled,
+                a RuntimeError with its traceback is raised instead.
+
+        Keyword Args:
+            workers (int): maximum number of branches running at once. If not set,
+                the number of processors is used.
+
+        Returns:
+            dict: result of each branch by name
+        """
+        if self.trace is not None or any(
+            self.pm.get_resource(r).usage_log.path is not None
+            for r in self.pm.rm.resources
+        ):
+            raise ValueError('Branches cannot share trace or usage files')
+        # Process definitions are generators, which can only be copied by forking
+        context = multiprocessing.get_context('fork')
+        workers = kwargs.get('workers', None) or os.cpu_count()
+
+        # Users and arrival sources are started before forking, as in a run
+        self._start()
+        names = list(branches)
+        results = {}
+        for i in range(0, len(names), workers):
+            running = []
+            try:
+                for name in names[i:i + workers]:
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(
+                        target=_run_branch, args=(self, branches[name], sender)
+                    )
+                    process.start()
+                    sender.close()
+                    running.append((name, process, receiver))
+                for name, process, receiver in running:
+                    results[name] = _receive_branch(name, process, receiver)
+            finally:
+                # Branches still running once one has failed are stopped
+                for _, process, receiver in running:
+                    if process.is_alive():
+                        process.terminate()
+                    process.join()
+                    receiver.close()
+        return results
+
+    def get_new_checkpoints(self):
+        """
+        Checkpoints recorded since the last call, in a data frame
+
+        Returns:
+            DataFrame
+        """
+        frame = self.um.checkpoint_log.to_frame_from(self._checkpoints_read)
+        self._checkpoints_read += len(frame)
+        return frame
+
+    def get_new_usage(self, resource=None):
+        """
+        Usage records since the last call, of all resources or a single one
+
+        Args:
+            resource (str): name of the resource
+
+        Returns:
+            DataFrame: records sorted by instant, with the name of the resource
+        """
+        resources = self.pm.rm.resources if resource is None else [resource]
+        frames = [DataFrame(columns=['resource'] + USAGE_COLUMNS)]
+        for r in resources:
+            if r not in self._usage_cursors:
+                self._usage_cursors[r] = UsageCursor(self.pm.get_resource(r).usage_log)
+            frame = self._usage_cursors[r].read()
+            frame.insert(0, 'resource', r)
+            frames.append(frame)
+        return concat(frames, ignore_index=True)\
+            .sort_values('instant', kind='stable', ignore_index=True)
 
     @property
     def checkpoints(self):
         """
         Combine checkpoints of all users in a time indexed data frame
         """
-        checkpoints = []
-        for user in self.um.users:
-            for checkpoint in self.um.get_user(user).checkpoints:
-                checkpoints.append({'user': user, **checkpoint})
+        return self.get_checkpoints()
 
-        return DataFrame(checkpoints).sort_values(
-            by='instant').reset_index(drop=True)
+    def get_checkpoints(self, user=None, start=None, end=None):
+        """
+        Checkpoints in a time indexed data frame, filtered by user and/or time range
+
+        Args:
+            user (str): name of the user
+            start (float/datetime): minimum instant
+            end (float/datetime): maximum instant
+        """
+        return self.um.checkpoint_log.to_frame(
+            user=user,
+            start=None if start is None else parse_time(start),
+            end=None if end is None else parse_time(end)
+        )
 
     def get_state(self, at):
         """
         Return the occupation and queues of each resource `at` a given instant
 
         Args:
-            at (float): target instant
+            at (float/datetime): target instant
+        """
+        return self.get_states([at]).drop(columns='instant')
+
+    def get_states(self, at):
+        """
+        Return the occupation and queues of each resource at each of the given instants
+
+        Args:
+            at (list): target instants
+
+        Returns:
+            DataFrame: state of each resource, sorted by instant
         """
+        instants = [parse_time(a) for a in at]
+        order = sorted(range(len(at)), key=lambda i: instants[i])
+        if self.trace is not None:
+            # Reading the trace once for all resources
+            trace_states = self.trace.reader().get_states(instants)
+            resource_states = {
+                r: [s.get(r, ([], [])) for s in trace_states]
+                for r in self.pm.rm.resources
+            }
+        else:
+            resource_states = {
+                r: self.pm.get_resource(r).usage_log.states_at(instants)
+                for r in self.pm.rm.resources
+            }
         state = []
-        empty = {'users': [], 'queue': []}
-        for r in self.pm.rm.resources:
-            resource_state = (
-                self.pm.get_resource(r).usage
-                .query(f'instant<={at}').tail(1)
-                [['users', 'queue']].to_dict('records')
-            )
-            if resource_state:
-                state.append({'resource': r, **resource_state[0]})
-            else:
-                state.append({'resource': r, **empty})
-        state_df = DataFrame(state)
+        for i in order:
+            for r, states in resource_states.items():
+                users, queue = states[i]
+                state.append({
+                    'instant': at[i], 'resource': r, 'users': users, 'queue': queue
+                })
+        state_df = DataFrame(state, columns=['instant', 'resource', 'users', 'queue'])
         return state_df
+
+    def get_resource_summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Usage statistics of each resource, updated along the simulation
+
+        Args:
+            quantiles (list): quantiles of the waiting time to estimate
+
+        Returns:
+            DataFrame: statistics indexed by resource
+        """
+        summary = [
+            {'resource': r, **self.pm.get_resource(r).get_counters(quantiles)}
+            for r in self.pm.rm.resources
+            if self.pm.get_resource(r).report
+        ]
+        return DataFrame(summary).set_index('resource') if summary else DataFrame()
+
+    def get_process_summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Statistics of the users going through each process, updated along the
+        simulation
+
+        Args:
+            quantiles (list): quantiles of the time taken to complete the process
+
+        Returns:
+            DataFrame: number of entries and completions, and time taken to complete
+            each process, indexed by process
+        """
+        summary = []
+        for p in self.pm.processes:
+            stats = self.pm.get_process(p).stats
+            summary.append({
+                'process': p,
+                'entries': stats.entries,
+                'completions': stats.completions,
+                **stats.durations.summary('duration', quantiles)
+            })
+        return DataFrame(summary).set_index('process')
+
+    def get_waiting_summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Time waited for each resource in each process, updated along the simulation
+
+        Args:
+            quantiles (list): quantiles of the waiting time to estimate
+
+        Returns:
+            DataFrame: statistics indexed by process and resource
+        """
+        summary = []
+        for p in self.pm.processes:
+            for r, waits in self.pm.get_process(p).stats.waits.items():
+                summary.append({
+                    'process': p,
+                    'resource': r,
+                    'waits': waits.count,
+                    **waits.summary('wait', quantiles)
+                })
+        columns = ['process', 'resource', 'waits', 'mean_wait', 'max_wait'] + [
+            f'wait_p{100 * q:g}' for q in quantiles
+        ]
+        return DataFrame(summary, columns=columns).set_index(['process', 'resource'])
+
+    def get_profile_summary(self):
+        """
+        Time spent by kind of event and component in the runs made with `profile`
+
+        Returns:
+            DataFrame: calls, seconds, microseconds per call and share of the time
+            spent processing events, indexed by kind and component
+        """
+        if self.profiler is None:
+            raise ValueError('No run has been profiled, use run(profile=True)')
+        return self.profiler.summary()
@@ -19,6 +19,7 @@ class ProcessManager(Manager):
             flow (DataFrame): Processes flow
             processes (dict_keys): All processes attached to this manager
             rm (:class:`.ResourceManager`): :class:`.ResourceManager` linked to this manager
+            routes (dict): Next process of each process, compiled when the flow is blocked
         """
         super().__init__()
         self.env = kwargs.get('env', simpy.Environment())
@@ -26,6 +27,9 @@ class ProcessManager(Manager):
         self.processes = self._store.keys()
         self.reset_flow()
 
+        # Process being run by each running definition
+        self._running = {}
+
     def create_resource(self, names, **kwargs):
         """
         Shortcut for `create_resource` method in :class:`.ResourceManager`.
@@ -36,6 +40,17 @@ class ProcessManager(Manager):
         """
         self.rm.create_resource(names, **kwargs)
 
+    def create_pool(self, name, units, **kwargs):
+        """
+        Shortcut for `create_pool` method in :class:`.ResourceManager`.
+
+        Args:
+            name (str): Name of the pool to be created
+            units (list): dicts with the `name` and other attributes of each unit
+            **kwargs: Arbitrary keyword arguments
+        """
+        self.rm.create_pool(name, units, **kwargs)
+
     def get_resource(self, name):
         """
         Shortcut for `get_resource` method in :class:`.ResourceManager`.
@@ -77,17 +92,44 @@ class ProcessManager(Manager):
         """
         return self._store[name]
 
+    @property
+    def flow(self):
+        """
+        Processes flow as a data frame, materialised from the links defined so far.
+        """
+        if self._flow_frame is None:
+            self._flow_frame = DataFrame(self._flow, columns=['from', 'to'])
+        return self._flow_frame
+
     def reset_flow(self):
         """
         Clear flow lookup table.
         """
-        self.flow = DataFrame(columns=['from', 'to'])
+        self._flow = []
+        self._flow_frame = None
         self.unblock_flow()
 
     def block_flow(self):
         """
-        Prevents flow to be changed.
-        """
+        Prevents flow to be changed, compiling it into a routing table.
+        """
+        successors = {}
+        for from_process, to_process in self._flow:
+            successors.setdefault(from_process, []).append(to_process)
+
+        # Several initial processes are allowed for parallel flows, as long as users
+        # declare their initial process
+        ambiguous = [
+            p for p, s in successors.items() if len(s) > 1 and p != 'initial'
+        ]
+        if ambiguous:
+            raise ValueError(
+                f'Next process is not uniquely defined: {ambiguous[0]} -> '
+                f'{successors[ambiguous[0]]}'
+            )
+
+        self.routes = {p: s[0] for p, s in successors.items() if len(s) == 1}
+        self._initial_processes = successors.get('initial', [])
         self.flow_blocked = True
 
     def unblock_flow(self):
@@ -95,6 +137,26 @@ class ProcessManager(Manager):
         Allows flow to be changed.
         """
         self.flow_blocked = False
+        self.routes = {}
+        self._initial_processes = []
+
+    def next_process(self, process):
+        """
+        Get the process following `process` in the blocked flow.
+
+        Args:
+            process (str)
+
+        Returns:
+            str
+        """
+        try:
+            return self.routes[process]
+        except KeyError:
+            if process == 'initial' and self._initial_processes:
+                raise ValueError(
+                    f'Next process is not uniquely defined: {self._initial_processes}')
+            raise ValueError(f'No process defined after {process}')
 
     def set_flow(self, **kwargs):
         """
@@ -113,54 +175,21 @@ class ProcessManager(Manager):
                 To force the definition of a new flow, call reset_flow.')
 
         if 'initial_process' in kwargs:
-            self.flow = self.flow.append(
-                {
-                    'from': 'initial',
-                    'to': kwargs['initial_process']
-                },
-                ignore_index=True
-            )
+            links = [('initial', kwargs['initial_process'])]
 
         elif 'final_process' in kwargs:
-            self.flow = self.flow.append(
-                {
-                    'from': kwargs['final_process'],
-                    'to': 'final'
-                },
-                ignore_index=True
-            )
+            links = [(kwargs['final_process'], 'final')]
 
         elif ('from_process' in kwargs) and ('to_process' in kwargs):
-            self.flow = self.flow.append(
-                {
-                    'from': kwargs['from_process'],
-                    'to': kwargs['to_process']
-                },
-                ignore_index=True
-            )
+            links = [(kwargs['from_process'], kwargs['to_process'])]
 
         elif 'sequence' in kwargs:
-            self.flow = self.flow.append(
-                {
-                    'from': 'initial',
-                    'to': kwargs['sequence'][0]
-                },
-                ignore_index=True
-            )
-            for p in range(len(kwargs['sequence']) - 1):
-                self.flow = self.flow.append(
-                    {
-                        'from': kwargs['sequence'][p],
-                        'to': kwargs['sequence'][p + 1]
-                    },
-                    ignore_index=True
-                )
-            self.flow = self.flow.append(
-                {
-                    'from': kwargs['sequence'][-1],
-                    'to': 'final'
-                },
-                ignore_index=True
-            )
+            sequence = list(kwargs['sequence'])
+            links = list(zip(['initial'] + sequence, sequence + ['final']))
+
         else:
             warnings.warn(f'{kwargs} kwargs not recognised')
+            return
+
+        self._flow.extend(links)
+        self._flow_frame = None
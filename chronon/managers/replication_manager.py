@@ -0,0 +1,119 @@
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pandas import concat
+from ..core.manager import Manager
+
+
+def _run_replication(builder, seed, run_kwargs):
+    """Build and run one replication, returning its reports."""
+    random.seed(seed)
+    np.random.seed(seed)
+    em = builder()
+    em.run(**run_kwargs)
+    return {
+        'checkpoints': em.checkpoints,
+        'usage': {r: em.pm.get_resource(r).usage for r in em.pm.rm.resources}
+    }
+
+
+class ReplicationManager(Manager):
+    def __init__(self, builder, **kwargs):
+        """
+        Manager of replications of a stochastic simulation.
+
+        Args:
+            builder (callable): function without arguments returning an
+                :class:`.EventManager` ready to run. It must be picklable (e.g.
+                defined at module level) to run in worker processes.
+
+        Keyword Args:
+            seed (int): seed from which the seeds of all replications are derived.
+                If not set, a random one is used.
+
+        Attributes:
+            builder (callable): function building the simulation
+            replications (dict_keys): All replications run by this manager
+            seed (int): seed from which the seeds of all replications are derived
+        """
+        self.builder = builder
+        super().__init__()
+        self.replications = self._store.keys()
+        self.seed = np.random.SeedSequence(kwargs.get('seed', None)).entropy
+
+    def get_seeds(self, n):
+        """
+        Seeds of the first `n` replications, independent of how they are run.
+
+        Args:
+            n (int)
+
+        Returns:
+            list
+        """
+        sequence = np.random.SeedSequence(self.seed)
+        return [int(s.generate_state(1)[0]) for s in sequence.spawn(n)]
+
+    def run(self, n, **kwargs):
+        """
+        Run `n` replications, seeding `random` and `numpy.random` before building
+        each of them.
+
+        Args:
+            n (int): number of replications
+
+        Keyword Args:
+            workers (int): number of worker processes. If 1, replications run in
+                this process. If not set, the number of processors is used.
+            **kwargs: Arbitrary keyword arguments passed to :meth:`.EventManager.run`
+        """
+        workers = kwargs.pop('workers', None)
+        seeds = self.get_seeds(n)
+        self._store.clear()
+
+        if workers == 1:
+            results = [_run_replication(self.builder, s, kwargs) for s in seeds]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _run_replication,
+                    [self.builder] * n,
+                    seeds,
+                    [kwargs] * n
+                ))
+
+        for replication, result in enumerate(results):
+            self._store[replication] = result
+
+    @property
+    def checkpoints(self):
+        """
+        Combine checkpoints of all replications, identified by a `replication` column
+        """
+        return concat([
+            result['checkpoints'].assign(replication=replication)
+            [['replication', 'user', 'instant', 'info']]
+            for replication, result in self._store.items()
+        ], ignore_index=True)
+
+    @property
+    def usage(self):
+        """
+        Combine the usage of each resource in all replications, identified by a
+        `replication` column
+
+        Returns:
+            dict: usage data frame of each resource
+        """
+        usage = {}
+        for replication, result in self._store.items():
+            for resource, resource_usage in result['usage'].items():
+                usage.setdefault(resource, []).append(
+                    resource_usage.assign(replication=replication)
+                )
+        return {
+            resource: concat(frames, ignore_index=True)[
+                ['replication', *frames[0].columns.drop('replication')]
+            ]
+            for resource, frames in usage.items()
+        }
@@ -1,5 +1,5 @@
 from ..core.manager import Manager
-from ..core.resource import Resource
+from ..core.resource import Resource, ResourcePool, AnyOfQueue
 
 
 class ResourceManager(Manager):
@@ -18,6 +18,32 @@ class ResourceManager(Manager):
         super().__init__()
         self.resources = self._store.keys()
 
+        # Resources with queued synched requests, indexed by each resource of the group
+        self._synched = {}
+        # Resources pending to be triggered, kept as an ordered set
+        self._ready = {}
+
+        # Number of requests using/queueing, by resource
+        self._with_users = {}
+        self._with_queues = {}
+        # Requests using/queueing by user name and resource, as handles to release or
+        # dequeue them directly
+        self._using = {}
+        self._queueing = {}
+        # Resources reneged on by user name, which may still be released as no-ops
+        # until the user requests resources again
+        self._reneged = {}
+        # Resources indexed by property name and value
+        self._properties = {}
+
+        # Queues of requests for any of several resources, by list of resources and
+        # by member, and waiting requests by user name
+        self._any_of = {}
+        self._any_of_by_member = {}
+        self._waiting_any_of = {}
+        # Number of requests made, ordering them across queues
+        self._n_arrivals = 0
+
     def create_resource(self, names, **kwargs):
         """
         Args:
@@ -34,7 +60,32 @@ class ResourceManager(Manager):
             names = [names]
 
         for n in names:
-            self._store[n] = ResourceClass(self, n, **kwargs)
+            self._add_resource(ResourceClass(self, n, **kwargs), kwargs)
+
+    def create_pool(self, name, units, **kwargs):
+        """
+        Args:
+            name (str): Name of the pool to be created
+            units (list): dicts with the `name` and other attributes of each unit
+            **kwargs: Arbitrary keyword arguments
+
+        Keyword Args:
+            custom_pool (:class:): Custom pool class
+            custom_unit (:class:): Custom unit class
+            report (bool): Create report on pool usage or not
+        """
+        PoolClass = kwargs.pop('custom_pool', ResourcePool)
+        self._add_resource(PoolClass(self, name, units=units, **kwargs), kwargs)
+
+    def _add_resource(self, resource, kwargs):
+        """Store a resource, indexing the properties set by `kwargs`"""
+        for key in ['name', *kwargs]:
+            self._index_property_name(key)
+
+        self._store[resource.name] = resource
+        for key in ['name', *kwargs]:
+            if key in resource.__dict__:
+                self._index_property(resource, key, resource.__dict__[key])
 
     def get_resource(self, name):
         """
@@ -68,68 +119,243 @@ class ResourceManager(Manager):
         by_user_queueing = kwargs.get('by_user_queueing', None)
         by_properties = kwargs.get('by_properties', None)
 
-        resources = []
-
         # All resources
         if by_user is None and by_user_queueing is None:
-            resources = [self._store[k] for k in self._store.keys()]
+            if by_properties is not None:
+                return self._get_resources_by_properties(by_properties)
+            return list(self._store.values())
+
+        resources = {}
 
         # Resources with users
         if by_user == 'any':
-            resources += self.get_resources_with_users()
+            resources.update(self._with_users)
 
         # Resources specific users
         elif by_user is not None:
             if not isinstance(by_user, list):
                 by_user = [by_user]
             for user in by_user:
-                resources += self.get_resources_with_users(by_user=user)
+                resources.update(self._using.get(getattr(user, 'name', user), {}))
 
         # Resources with queues
         if by_user_queueing == 'any':
-            resources += self.get_resources_with_queues()
+            resources.update(self._with_queues)
 
         # Resources with specific users on queues
         elif by_user_queueing is not None:
             if not isinstance(by_user_queueing, list):
                 by_user_queueing = [by_user_queueing]
             for user in by_user_queueing:
-                resources += self.get_resources_with_queues(by_user=user)
-
-        resources = list(set(resources))
+                resources.update(self._queueing.get(getattr(user, 'name', user), {}))
 
         # Resources filtered by property
         if by_properties is not None:
-            resources = [
-                r for r in resources if by_properties.items() <= r.__dict__.items()
+            return [
+                r for r in self._get_resources_by_properties(by_properties)
+                if r in resources
             ]
 
-        return resources
+        return list(resources)
 
     def get_resources_with_users(self, by_user=None):
         if by_user is None:
-            return [
-                self.get_resource(r) for r in self.resources
-                if len(self.get_resource(r).users) > 0
-            ]
+            return list(self._with_users)
         else:
             # Supports both user and user.name
-            return [
-                self.get_resource(r) for r in self.resources
-                if by_user in [request.user.name for request in self.get_resource(r).users]
-                or by_user in [request.user for request in self.get_resource(r).users]
-            ]
+            return list(self._using.get(getattr(by_user, 'name', by_user), {}))
 
     def get_resources_with_queues(self, by_user=None):
         if by_user is None:
-            return [
-                self.get_resource(r) for r in self.resources
-                if len(self.get_resource(r).queue) > 0
-            ]
+            return list(self._with_queues)
         else:
             # Supports both user and user.name
-            return [
-                self.get_resource(r) for r in self.resources
-                if by_user in [request.user.name for request in self.get_resource(r).queue]
-                or by_user in [request.user for request in self.get_resource(r).queue]
+            return list(self._queueing.get(getattr(by_user, 'name', by_user), {}))
+
+    def get_any_of_queue(self, resources):
+        """
+        Get the queue of requests for any of `resources`, created on first use.
+
+        Args:
+            resources (list): :class:`.Resource` in order of preference
+
+        Returns:
+            :class:`.AnyOfQueue`
+        """
+        key = tuple(resources)
+        if key not in self._any_of:
+            queue = AnyOfQueue(self, resources)
+            self._any_of[key] = queue
+            for r in queue.members:
+                self._any_of_by_member.setdefault(r, []).append(queue)
+        return self._any_of[key]
+
+    def _get_resources_by_properties(self, by_properties):
+        """Resources matching all properties, looked up in the properties index
+        whenever possible"""
+        indexed = {}
+        not_indexed = {}
+        for key, value in by_properties.items():
+            try:
+                indexed[key] = self._properties[key].get(value, {})
+            except (KeyError, TypeError):
+                not_indexed[key] = value
+
+        if indexed:
+            candidates = sorted(indexed.values(), key=len)
+            resources = [
+                r for r in candidates[0]
+                if all(r in c for c in candidates[1:])
             ]
+        else:
+            resources = self._store.values()
+
+        return [
+            r for r in resources if not_indexed.items() <= r.__dict__.items()
+        ]
+
+    def _index_property_name(self, key):
+        """Start indexing property `key`, including existing resources"""
+        if key not in self._properties:
+            self._properties[key] = {}
+            for resource in self._store.values():
+                if key in resource.__dict__:
+                    self._index_property(resource, key, resource.__dict__[key])
+
+    def _index_property(self, resource, key, value):
+        try:
+            self._properties[key].setdefault(value, {})[resource] = None
+        except TypeError:
+            # Unhashable values are not indexed and can't match hashable ones
+            pass
+
+    def _unindex_property(self, resource, key, value):
+        try:
+            self._properties[key].get(value, {}).pop(resource, None)
+        except TypeError:
+            pass
+
+    @staticmethod
+    def _count(index, key, value, increment):
+        counts = index.setdefault(key, {})
+        counts[value] = counts.get(value, 0) + increment
+        if counts[value] == 0:
+            del counts[value]
+            if not counts:
+                del index[key]
+
+    @staticmethod
+    def _add_handle(index, request, resource=None):
+        if resource is None:
+            resource = request.resource
+        index.setdefault(request.user.name, {}).setdefault(resource, {})[request] = None
+
+    @staticmethod
+    def _remove_handle(index, request, resource=None):
+        if resource is None:
+            resource = request.resource
+        resources = index[request.user.name]
+        requests = resources[resource]
+        del requests[request]
+        if not requests:
+            del resources[resource]
+            if not resources:
+                del index[request.user.name]
+
+    def _renege(self, user, resources):
+        """Flag resources reneged on by `user`"""
+        self._reneged.setdefault(user.name, {}).update(dict.fromkeys(resources))
+
+    def _unrenege(self, user, resource):
+        """Unflag a resource reneged on by `user`, returning whether it was flagged"""
+        reneged = self._reneged.get(user.name)
+        if reneged is None or resource not in reneged:
+            return False
+        del reneged[resource]
+        if not reneged:
+            del self._reneged[user.name]
+        return True
+
+    def _enqueue(self, request):
+        """Index a request joining the queue of its resource"""
+        resource = request.resource
+        self._with_queues[resource] = self._with_queues.get(resource, 0) + 1
+        self._add_handle(self._queueing, request)
+
+        # Synched requests must be reassessed whenever any resource of the group
+        # frees capacity
+        if request.synched_resources:
+            for r in request.synched_resources:
+                if r is not resource:
+                    self._count(self._synched, r, resource, 1)
+
+    def _dequeue(self, request):
+        """Unindex a request leaving the queue of its resource"""
+        resource = request.resource
+        self._with_queues[resource] -= 1
+        if self._with_queues[resource] == 0:
+            del self._with_queues[resource]
+        self._remove_handle(self._queueing, request)
+
+        if request.synched_resources:
+            for r in request.synched_resources:
+                if r is not resource:
+                    self._count(self._synched, r, resource, -1)
+
+    def _use(self, request):
+        """Index a request granted access to its resource"""
+        resource = request.resource
+        self._with_users[resource] = self._with_users.get(resource, 0) + 1
+        self._add_handle(self._using, request)
+
+    def _unuse(self, request):
+        """Unindex a request released from its resource"""
+        resource = request.resource
+        self._with_users[resource] -= 1
+        if self._with_users[resource] == 0:
+            del self._with_users[resource]
+        self._remove_handle(self._using, request)
+
+    def _wait_any_of(self, request):
+        """Index a request joining an :class:`.AnyOfQueue`, as queueing on every
+        candidate resource"""
+        self._waiting_any_of.setdefault(request.user.name, {})[request] = None
+        for resource in request.queue.members:
+            self._with_queues[resource] = self._with_queues.get(resource, 0) + 1
+            self._add_handle(self._queueing, request, resource)
+
+    def _unwait_any_of(self, request):
+        """Unindex a request leaving an :class:`.AnyOfQueue`"""
+        waiting = self._waiting_any_of[request.user.name]
+        del waiting[request]
+        if not waiting:
+            del self._waiting_any_of[request.user.name]
+        for resource in request.queue.members:
+            self._with_queues[resource] -= 1
+            if self._with_queues[resource] == 0:
+                del self._with_queues[resource]
+            self._remove_handle(self._queueing, request, resource)
+
+    def _next_arrival(self):
+        """Sequence number of a new request"""
+        self._n_arrivals += 1
+        return self._n_arrivals
+
+    def _set_ready(self, resource):
+        """Flag resources whose queued requests may be granted after `resource`
+        frees capacity"""
+        for r in self._synched.get(resource, ()):
+            self._ready[r] = None
+
+    def _trigger_ready(self, event):
+        """Trigger PUT only on resources flagged as ready.
+
+        Ready resources are triggered in the order they were flagged, and all of
+        them are triggered by the first release processed, before the queues of
+        resources released later at the same instant. Free resources unrelated to
+        the releases are not reassessed.
+        """
+        while self._ready:
+            resource = next(iter(self._ready))
+            del self._ready[resource]
+            resource._trigger_put(event)
@@ -1,5 +1,6 @@
 from ..core.manager import Manager
-from ..core.user import User
+from ..core.checkpoint import CheckpointLog
+from ..core.user import User, CompactUser, UserTable
 
 
 class UserManager(Manager):
@@ -9,12 +10,17 @@ class UserManager(Manager):
             pm (:class:`.ProcessManager`)
 
         Attributes:
+            checkpoint_log (:class:`.CheckpointLog`): Checkpoints of all users
             pm (:class:`.ProcessManager`): :class:`.ProcessManager` linked to this manager
             users (dict_keys): All users attached to this manager
         """
         self.pm = pm
         super().__init__()
         self.users = self._store.keys()
+        self.checkpoint_log = CheckpointLog()
+        self._user_tables = {}
+        # Users created and not taken by the event manager yet, by name
+        self._new_users = {}
 
     def create_user(self, name, **kwargs):
         """
@@ -37,7 +43,7 @@ class UserManager(Manager):
 
         users = []
         for n in name:
-            self._store[n] = UserClass(self, self.pm, n, **kwargs)
+            self._store[n] = self._new_users[n] = UserClass(self, self.pm, n, **kwargs)
             users.append(self._store[n])
 
         if len(users) == 1:
@@ -45,6 +51,61 @@ class UserManager(Manager):
 
         return users
 
+    def create_users(self, table, **kwargs):
+        """
+        Create users in bulk, one per row of a table.
+
+        Attributes are stored as columns of the table of the user class, without
+        creating a set of attributes per user. Users created from tables are
+        :class:`.CompactUser` by default.
+
+        Args:
+            table (DataFrame/dict): columns of equal length, with the `name` of each
+                user, and optionally their `instant`, `initial_process` and any other
+                attribute (e.g. lists or arrays)
+            **kwargs: Arbitrary keyword arguments shared by all users
+
+        Keyword Args:
+            custom_user (:class:): Custom user class. Subclasses of
+                :class:`.CompactUser` are created from the columns at once, other
+                classes user by user.
+
+        Returns:
+            list: created users
+        """
+        UserClass = kwargs.pop('custom_user', CompactUser)
+        columns = {key: table[key] for key in table.keys() if key != 'name'}
+        names = list(table['name'])
+        n_rows = len(names)
+
+        if not issubclass(UserClass, CompactUser):
+            columns = {
+                key: values.tolist() if hasattr(values, 'tolist') else list(values)
+                for key, values in columns.items()
+            }
+            return [
+                self.create_user(
+                    name, custom_user=UserClass,
+                    **{**kwargs, **{key: columns[key][i] for key in columns}}
+                )
+                for i, name in enumerate(names)
+            ]
+
+        # Users created again are replaced, releasing their rows
+        for name in self._store.keys() & set(names):
+            self.remove_user(name)
+
+        columns.setdefault('instant', [0] * n_rows)
+        columns.setdefault('initial_process', ['initial'] * n_rows)
+        for key, value in kwargs.items():
+            columns.setdefault(key, [value] * n_rows)
+
+        rows = self.get_user_table(UserClass).add_rows(columns, n_rows)
+        users = [UserClass._from_row(self, n, row) for n, row in zip(names, rows)]
+        self._store.update(zip(names, users))
+        self._new_users.update(zip(names, users))
+        return users
+
     def get_user(self, name):
         """Get user by name.
 
@@ -56,6 +117,41 @@ class UserManager(Manager):
         """
         return self._store[name]
 
+    def remove_user(self, name):
+        """Remove user from the manager, keeping its checkpoints.
+        Attributes of a removed :class:`.CompactUser` are no longer available.
+
+        Args:
+            name (str)
+
+        Returns:
+            :class:`.User`
+        """
+        user = self._store.pop(name)
+        if self._new_users.get(name) is user:
+            del self._new_users[name]
+        if isinstance(user, CompactUser):
+            self.get_user_table(type(user)).remove_row(user._row)
+        return user
+
+    def _take_new_users(self):
+        """Users created since the last call, in order of creation"""
+        users, self._new_users = self._new_users, {}
+        return users.values()
+
+    def get_user_table(self, user_class):
+        """Get the attributes table of a compact user class.
+
+        Args:
+            user_class (:class:`.CompactUser`)
+
+        Returns:
+            :class:`.UserTable`
+        """
+        if user_class not in self._user_tables:
+            self._user_tables[user_class] = UserTable()
+        return self._user_tables[user_class]
+
     def set_user(self, name, **kwargs):
         """Set user attributes
 
@@ -39,9 +39,7 @@ class CustomerWaitCounter(Process):
             user.releases('counters')
             user.set_checkpoint('Finished')
         else:
-            # release the resource
-            user.releases('counters')
-            # customer reneged
+            # customer reneged, its request was withdrawn from the queue
             user.set_checkpoint('Reneged')
 
 
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 import random
-from chronon import ProcessManager, EventManager, Process, Resource
+from chronon import ProcessManager, EventManager, Process
 
 STATIONS = ['Station A', 'Station B', 'Station C']
 TARGET_OCCUPATION = 0.7
@@ -16,29 +16,29 @@ distances = abs(station_x.reshape(-1, 1) - station_x)
 # Bike process
 class IncludeBike(Process):
     def definition(self, bike):
-        yield bike.waits(bike.initial_dock)
+        yield bike.waits('docks', having={'name': bike.initial_dock})
 
 # Cyclist process
 class Cycle(Process):
     def definition(self, cyclist):
-        # Request a bike-as-resource
+        # Request a bike-as-resource, from the units of the pool of bikes
         cyclist.set_checkpoint(f'Requested a bike at {cyclist.from_station}')
         response = yield cyclist.waits(
-            self.get_resources(by_properties={'type': 'bike'}),
-            which='any',
+            'bikes',
             having={'station': cyclist.from_station}
         )
 
-        # Get the bike-as-user based on the name of the bike-as-resource obtained by the cyclist-as-user
-        bike_resource = response.events[0].resource
-        bike = cyclist.get_user(bike_resource.name)
+        # Get the bike-as-user based on the name of the bike unit obtained by the cyclist-as-user
+        bike_unit = response.events[0].unit
+        bike = cyclist.get_user(bike_unit.name)
 
         # Undock bike-as-user from the station of origin
-        origin_dock = self.get_resources(by_user=bike)[0]
+        origin_dock = self.get_resource('docks').get_units(by_user=bike)[0]
         cyclist.set_checkpoint(
-            f'Got {bike_resource.name} at {origin_dock.station}'
+            f'Got {bike_unit.name} at {origin_dock.station}'
         )
-        bike.releases(origin_dock)
+        bike.releases('docks')
+        bike_unit.station = None
         bike.set_checkpoint(
             f'Undocked from {origin_dock.name} at {origin_dock.station}'
         )
@@ -54,19 +54,17 @@ class Cycle(Process):
         # Dock bike-as-user at the destination station
         bike.set_checkpoint(f'Requested a dock at {cyclist.to_station}')
         response = yield bike.waits(
-            self.get_resources(by_properties={
-                'type': 'dock', 
-                'station': cyclist.to_station
-            }),
-            which='any',
+            'docks',
+            having={'station': cyclist.to_station}
         )
-        dest_dock = response.events[0].resource
+        dest_dock = response.events[0].unit
+        bike_unit.station = dest_dock.station
         bike.set_checkpoint(f'Docked on {dest_dock.name} at {dest_dock.station}')
 
         # Finish cycle
-        cyclist.releases(bike_resource)
+        cyclist.releases('bikes')
         cyclist.set_checkpoint(
-            f'Left {bike_resource.name} at {dest_dock.station}'
+            f'Left {bike_unit.name} at {dest_dock.station}'
         )
 
 pm.attach_process(IncludeBike)
@@ -78,39 +76,25 @@ pm.set_flow(final_process='Cycle')
 
 em = EventManager(pm)
 
-# Custom Resource class for bikes
-class BikeResource(Resource):
-    @property
-    def station(self):
-        # Bike-user and bike-resource have the same name
-        dock = self.rm.get_resources(by_user=self.name)
-        if len(dock) == 0:
-            return None
-        else:
-            return dock[0].station
-
-# Creating station docks as resources
-docks = [random.randint(2, 4) for s in STATIONS]
-for index, [name, capacity] in enumerate(zip(STATIONS, docks)):
-    for d in range(capacity):
-        pm.create_resource(f'dock_{index}{d}', type='dock', station=name)
-
-# Creating bikes as resources (for customers) and users (of docks)
-bid = 0
-dock_resources = pm.get_resources(by_properties={'type': 'dock'})
-for dock in dock_resources:
+# Creating station docks as units of a pool
+docks = []
+for index, name in enumerate(STATIONS):
+    for d in range(random.randint(2, 4)):
+        docks.append({'name': f'dock_{index}{d}', 'station': name})
+pm.create_pool('docks', docks)
+
+# Creating bikes as units of a pool (for customers) and users (of docks)
+bikes = []
+for dock in docks:
     if random.uniform(0, 1) < TARGET_OCCUPATION:
-        pm.create_resource(
-            f'bike_{bid}',
-            custom_resource=BikeResource,
-            type='bike'
-        )
+        bike = {'name': f'bike_{len(bikes)}', 'station': dock['station']}
+        bikes.append(bike)
         em.create_user(
-            f'bike_{bid}',
+            bike['name'],
             initial_process='IncludeBike',
-            initial_dock=dock
+            initial_dock=dock['name']
         )
-        bid += 1
+pm.create_pool('bikes', bikes)
 
 # Creating cyclists as users
 for c in range(N_CYCLISTS):
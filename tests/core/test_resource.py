@@ -0,0 +1,466 @@
+import heapq
+import random
+
+import pytest
+from chronon import Process
+from chronon import ProcessManager
+from chronon import EventManager
+from chronon import RequestQueue
+
+
+def test_synched_request_wakes_up_on_release():
+    pm = ProcessManager()
+    pm.create_resource(['R1', 'R2', 'R3'])
+
+    class Holder(Process):
+        def definition(self, user):
+            yield user.waits('R2')
+            yield user.waits(2)
+            user.releases('R2')
+
+    class Synched(Process):
+        def definition(self, user):
+            yield user.waits(['R1', 'R2'])
+            user.set_checkpoint('Got both')
+            user.releases(['R1', 'R2'])
+
+    pm.attach_process(Holder)
+    pm.attach_process(Synched)
+    pm.set_flow(sequence=['Holder'])
+    pm.set_flow(initial_process='Synched')
+    pm.set_flow(final_process='Synched')
+
+    em = EventManager(pm)
+    em.create_user('holder', initial_process='Holder')
+    em.create_user('synched', instant=1, initial_process='Synched')
+    em.run()
+
+    assert em.checkpoints['instant'][0] == 2
+    assert pm.get_resource('R3') not in pm.rm._synched
+    assert pm.rm._ready == {}
+
+
+def _run_counter(**kwargs):
+    pm = ProcessManager()
+    pm.create_resource('counter', capacity=2, **kwargs)
+
+    class UseCounter(Process):
+        def definition(self, user):
+            yield user.waits('counter', patience=3)
+            if user in [r.user for r in self.get_resource('counter').users]:
+                yield user.waits(5)
+            user.releases('counter')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    for i in range(10):
+        em.create_user(f'user_{i}', instant=i)
+    em.run()
+    return pm.get_resource('counter').usage
+
+
+def test_usage_snapshots():
+    usage = _run_counter()
+    assert list(usage.columns) == ['instant', 'user', 'status', 'users', 'queue']
+    released = usage[usage['status'] == 'Released'].iloc[0]
+    assert released['user'] in released['users']
+    requested = usage[usage['user'] == 'user_2'].iloc[0]
+    assert requested['status'] == 'Requested'
+    assert requested['users'] == ['user_0', 'user_1']
+    assert requested['queue'] == ['user_2']
+    # Instants are reported as ints, as all of them are
+    assert usage['instant'].dtype == 'int64'
+
+
+def test_usage_streamed_to_disk(tmp_path):
+    path = tmp_path / 'counter.usage'
+    usage = _run_counter(usage_path=str(path), usage_buffer=4)
+    assert path.stat().st_size > 0
+    assert usage.equals(_run_counter())
+
+
+def test_any_of_single_queue():
+    pm = ProcessManager()
+    pm.create_resource(['R1', 'R2'])
+
+    class UseAny(Process):
+        def definition(self, user):
+            yield user.waits(['R1', 'R2'], which='any', patience=user.patience)
+            using = self.get_resources(by_user=user)
+            if using:
+                user.set_checkpoint(f'Got {using[0].name}')
+                yield user.waits(3)
+                user.releases(using)
+            else:
+                user.set_checkpoint('Reneged')
+                user.releases(['R1', 'R2'])
+
+    pm.attach_process(UseAny)
+    em = EventManager(pm)
+    for i, (instant, patience) in enumerate([(0, 10), (0, 10), (1, 10), (1, 1)]):
+        em.create_user(f'user_{i}', instant=instant, patience=patience)
+    r1, r2 = pm.get_resource('R1'), pm.get_resource('R2')
+
+    # Waiting users queue on every candidate
+    em.run(until=1.5)
+    assert pm.rm.get_resources(by_user_queueing='user_2') == [r1, r2]
+    assert pm.rm.get_resources_with_queues() == [r1, r2]
+    state = em.get_state(1.5).set_index('resource')
+    assert state.loc['R1', 'queue'] == ['user_2', 'user_3']
+    assert state.loc['R2', 'queue'] == ['user_2', 'user_3']
+    assert r2.usage_counters.queue == 2
+    em.run()
+
+    checkpoints = em.checkpoints.set_index('user')
+    assert checkpoints.loc['user_0', 'info'] == 'Got R1'
+    assert checkpoints.loc['user_1', 'info'] == 'Got R2'
+    assert tuple(checkpoints.loc['user_2']) == (3, 'Got R1')
+    assert tuple(checkpoints.loc['user_3']) == (2, 'Reneged')
+
+    # Users leave the queues of the other candidates once granted one
+    usage = r2.usage
+    assert list(usage['status']) == [
+        'Requested', 'Using', 'Requested', 'Requested', 'Reneged', 'Released', 'Unqueued'
+    ]
+    assert usage['queue'].iloc[-1] == []
+    assert list(r1.usage['status'][r1.usage['user'] == 'user_2']) == \
+        ['Requested', 'Using', 'Released']
+    assert r1.counters['requests'] == r2.counters['requests'] == 3
+    assert r2.usage_counters.queue == 0
+    assert pm.rm._waiting_any_of == {}
+    assert pm.rm._queueing == {} and pm.rm._with_queues == {}
+
+
+def _fan_out(capacities, users):
+    """Grants of requests for any of several resources queued on every candidate,
+    each resource serving its queue in order of arrival"""
+    free = dict(capacities)
+    waiting = []
+    events = [(user['instant'], 0, i, None) for i, user in enumerate(users)]
+    heapq.heapify(events)
+    grants = {}
+
+    def grant(i, resource, now):
+        grants[users[i]['name']] = (resource, now)
+        free[resource] -= 1
+        heapq.heappush(events, (now + users[i]['hold'], 1, i, resource))
+
+    while events:
+        now, released, i, resource = heapq.heappop(events)
+        if not released:
+            free_candidates = [r for r in users[i]['candidates'] if free[r]]
+            if free_candidates:
+                grant(i, free_candidates[0], now)
+            else:
+                waiting.append(i)
+            continue
+        free[resource] += 1
+        for j in waiting:
+            if resource in users[j]['candidates']:
+                waiting.remove(j)
+                grant(j, resource, now)
+                break
+    return grants
+
+
+def test_any_of_matches_fan_out():
+    class UseAny(Process):
+        def definition(self, user):
+            candidates = user.candidates
+            yield user.waits(
+                candidates if len(candidates) > 1 else candidates[0], which='any'
+            )
+            resource = self.get_resources(by_user=user)[0]
+            user.set_checkpoint(resource.name)
+            yield user.waits(user.hold)
+            user.releases(resource)
+
+    rng = random.Random(0)
+    for _ in range(100):
+        names = [f'R{i}' for i in range(rng.randint(2, 4))]
+        capacities = {name: rng.randint(1, 2) for name in names}
+        users = [
+            dict(name=f'user_{i}', instant=rng.uniform(0, 10), hold=rng.uniform(1, 6),
+                 candidates=rng.sample(names, min(rng.choice([1, 1, 2, 3]), len(names))))
+            for i in range(rng.randint(4, 14))
+        ]
+
+        pm = ProcessManager()
+        for name, capacity in capacities.items():
+            pm.create_resource(name, capacity=capacity)
+        pm.attach_process(UseAny)
+        em = EventManager(pm)
+        for user in users:
+            em.create_user(**user)
+        em.run()
+
+        grants = {row.user: (row.info, row.instant) for row in em.checkpoints.itertuples()}
+        assert grants == _fan_out(capacities, users)
+
+
+def test_resource_pool():
+    pm = ProcessManager()
+    pm.create_pool('bikes', [
+        {'name': 'bike_0', 'station': 'A'},
+        {'name': 'bike_1', 'station': 'B'},
+        {'name': 'bike_2', 'station': 'B'},
+    ])
+    pool = pm.get_resource('bikes')
+
+    class Ride(Process):
+        def definition(self, user):
+            response = yield user.waits('bikes', having={'station': user.station})
+            unit = response.events[0].unit
+            user.set_checkpoint(f'Got {unit.name}')
+            yield user.waits(2)
+            unit.station = user.destination
+            user.releases('bikes')
+
+    pm.attach_process(Ride)
+    em = EventManager(pm)
+    em.create_user('user_0', station='B', destination='A')
+    em.create_user('user_1', station='A', destination='B')
+    em.create_user('user_2', station='A', destination='A')
+    em.create_user('user_3', instant=1, station='C', destination='C')
+    em.run(until=10)
+
+    checkpoints = em.checkpoints.set_index('user')
+    assert tuple(checkpoints.loc['user_0']) == (0, 'Got bike_1')
+    assert tuple(checkpoints.loc['user_1']) == (0, 'Got bike_0')
+    # Served when user_0 leaves bike_1 at A, before user_1 leaves bike_0 at B
+    assert tuple(checkpoints.loc['user_2']) == (2, 'Got bike_1')
+    assert 'user_3' not in checkpoints.index
+
+    assert pool.capacity == 3
+    assert pool.get_units(by_user='user_3') == []
+    assert pool.get_units(by_properties={'station': 'B'}) == [
+        pool.get_unit('bike_0'), pool.get_unit('bike_2')
+    ]
+    assert [u.name for u in pool.get_units(free=True)] == ['bike_2', 'bike_0', 'bike_1']
+    assert pm.get_resources(by_user_queueing='user_3') == [pool]
+
+
+def test_synched_request_of_user_holding_a_resource():
+    pm = ProcessManager()
+    pm.create_resource(['R1', 'R2', 'R3'])
+
+    class Holder(Process):
+        def definition(self, user):
+            yield user.waits('R2')
+            yield user.waits(2)
+            user.releases('R2')
+
+    class Synched(Process):
+        def definition(self, user):
+            yield user.waits('R1')
+            yield user.waits(1)
+            # R1 is full, but used by this user
+            requests = user.requests(['R1', 'R2', 'R3'])
+            yield self.env.all_of(requests)
+            user.set_checkpoint('Got all')
+            assert [r.resource.count for r in requests] == [2, 1, 1]
+
+    pm.attach_process(Holder)
+    pm.attach_process(Synched)
+    pm.set_flow(sequence=['Holder'])
+    pm.set_flow(initial_process='Synched')
+    pm.set_flow(final_process='Synched')
+
+    em = EventManager(pm)
+    em.create_user('holder', initial_process='Holder')
+    em.create_user('synched', initial_process='Synched')
+    em.run()
+
+    assert em.checkpoints['instant'][0] == 2
+    # Requests of the group were granted together, when R2 was released
+    assert list(pm.get_resource('R3').usage['instant']) == [1, 2]
+
+
+def test_synched_group_granted_ahead_of_queue():
+    pm = ProcessManager()
+    pm.create_resource(['R1', 'R2', 'R3'])
+
+    class UseAll(Process):
+        def definition(self, user):
+            yield user.waits(user.resources)
+            user.set_checkpoint('Got all')
+            yield user.waits(2)
+            user.releases(user.resources)
+
+    pm.attach_process(UseAll)
+    em = EventManager(pm)
+    em.create_user('holder', resources=['R1', 'R2'])
+    em.create_user('single', resources=['R2'])
+    em.create_user('synched', instant=1, resources=['R1', 'R2', 'R3'])
+    em.run()
+
+    # Once R1 is granted, the rest of the group is granted at once, ahead of the
+    # request queued earlier on R2
+    checkpoints = em.checkpoints.set_index('user')
+    assert checkpoints.loc['synched', 'instant'] == 2
+    assert checkpoints.loc['single', 'instant'] == 4
+    for name in ['R1', 'R2', 'R3']:
+        usage = pm.get_resource(name).usage
+        grants = usage[usage['status'] == 'Using'].set_index('user')
+        assert grants.loc['synched', 'instant'] == 2
+
+
+def test_report_modes():
+    pm = ProcessManager()
+    pm.create_resource('traced')
+    pm.create_resource('sampled', report='sample', sample_interval=1)
+    pm.create_resource('counted', report='counters')
+
+    class UseAll(Process):
+        def definition(self, user):
+            yield user.waits(['traced', 'sampled', 'counted'])
+            yield user.waits(2)
+            user.releases(['traced', 'sampled', 'counted'])
+
+    pm.attach_process(UseAll)
+    em = EventManager(pm)
+    em.create_user('user_0')
+    em.create_user('user_1', instant=1)
+    em.run()
+
+    for name in ['traced', 'sampled', 'counted']:
+        counters = pm.get_resource(name).counters
+        assert counters['grants'] == 2
+        assert counters['mean_users'] == 1
+        assert counters['utilisation'] == 1
+        assert counters['mean_queue'] == 0.25
+        assert counters['throughput'] == 0.5
+
+    assert len(pm.get_resource('traced').usage) == 6
+    assert len(pm.get_resource('counted').usage) == 0
+    samples = pm.get_resource('sampled').samples
+    assert list(samples['users']) == [1, 1, 1, 1, 0]
+    assert list(samples['queue']) == [0, 1, 0, 0, 0]
+
+    with pytest.raises(ValueError):
+        pm.create_resource('wrong', report='sample')
+    for interval in [0, -1]:
+        with pytest.raises(ValueError):
+            pm.create_resource('wrong', report='sample', sample_interval=interval)
+
+
+def test_request_queue():
+    queue = RequestQueue()
+    for r in 'abcde':
+        queue.append(r)
+    queue.remove('c')
+    assert list(queue) == ['a', 'b', 'd', 'e'] and len(queue) == 4
+    assert 'c' not in queue and 'd' in queue
+    with pytest.raises(ValueError):
+        queue.remove('c')
+
+    # Requests can be removed and appended while iterating
+    seen = []
+    for r in queue:
+        seen.append(r)
+        if r == 'a':
+            queue.remove('a')
+            queue.remove('b')
+            queue.append('f')
+        elif r == 'd':
+            queue.remove('d')
+            queue.remove('e')
+    assert seen == ['a', 'd', 'f']
+    assert list(queue) == ['f']
+
+    # Requests are accessed by position, like in a list
+    for r in 'ghi':
+        queue.append(r)
+    queue.remove('h')
+    assert [queue[i] for i in range(-3, 3)] == ['f', 'g', 'i', 'f', 'g', 'i']
+    assert queue[1:] == ['g', 'i'] and queue[::-1] == ['i', 'g', 'f']
+    with pytest.raises(IndexError):
+        queue[3]
+
+
+def test_release_long_queue():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class Renege(Process):
+        def definition(self, user):
+            yield user.waits('counter', patience=user.patience)
+            if self.env.now < user.patience:
+                yield user.waits(5)
+            user.releases('counter')
+
+    pm.attach_process(Renege)
+    em = EventManager(pm)
+    for i in range(6):
+        em.create_user(f'user_{i}', patience=2 + i % 2)
+    em.run()
+    resource = pm.get_resource('counter')
+    assert len(resource.put_queue) == 0 and resource.count == 0
+    assert pm.rm._queueing == {} and pm.rm._using == {}
+    assert list(resource.usage['status']) == \
+        ['Requested', 'Using'] + ['Requested'] * 5 + ['Reneged'] * 5 + ['Released']
+
+
+def test_request_context_manager():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class UseCounter(Process):
+        def definition(self, user):
+            counter = self.get_resource('counter')
+            with counter.request(user=user) as request:
+                yield request | self.env.timeout(1)
+                if request.triggered:
+                    yield self.env.timeout(3)
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    em.create_user('user_0')
+    em.create_user('user_1')
+    em.run()
+
+    # Requests not granted on exit are dequeued, instead of released
+    resource = pm.get_resource('counter')
+    assert list(resource.usage['status']) == ['Requested', 'Using', 'Requested', 'Released']
+    assert resource.usage['queue'].iloc[-1] == []
+    assert resource.counters['releases'] == 1
+    assert len(resource.put_queue) == 0
+    assert pm.rm._queueing == {} and pm.rm._with_queues == {} and pm.rm._using == {}
+
+
+def test_renege():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+    pm.create_resource(['X', 'Y'])
+
+    class Renege(Process):
+        def definition(self, user):
+            waiting = user.waits('counter', patience=user.patience)
+            yield waiting
+            if user.name == 'user_0':
+                yield user.waits(5)
+                user.releases('counter')
+            elif user.name == 'user_2':
+                # Releasing after reneging is a no-op
+                user.releases('counter')
+            yield user.waits(['X', 'Y'], which='any', patience=user.patience)
+
+    pm.attach_process(Renege)
+    em = EventManager(pm)
+    for i in range(3):
+        em.create_user(f'user_{i}', patience=2 + i)
+
+    # Without patience, the process waits for the resources only
+    user = em.get_user('user_0')
+    assert type(user.waits(1)).__name__ == 'Timeout'
+
+    em.run()
+    usage = pm.get_resource('counter').usage
+    assert list(usage['status']) == [
+        'Requested', 'Using', 'Requested', 'Requested', 'Reneged', 'Reneged', 'Released'
+    ]
+    assert list(usage['instant'])[4:] == [3, 4, 5]
+    assert usage['queue'].iloc[5] == []
+    assert pm.get_resource('counter').counters['reneges'] == 2
+    # Users leaving the simulation are no longer flagged as reneging
+    assert pm.rm._reneged == {}
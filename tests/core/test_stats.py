@@ -0,0 +1,30 @@
+import math
+import random
+import numpy as np
+from chronon import QuantileSketch, StreamingStats
+
+
+def test_quantile_sketch():
+    random.seed(0)
+    values = [random.expovariate(1) for _ in range(10000)] + [0] * 100
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for v in values:
+        sketch.add(v)
+
+    # Expected quantiles are the next order statistics (numpy's 'higher' method)
+    ordered = sorted(values)
+    for q in [0.5, 0.9, 0.99]:
+        expected = ordered[math.ceil(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - expected) <= 0.01 * expected
+    assert sketch.quantile(0) == 0
+    # Memory depends on the range of values, not on their number
+    assert len(sketch._buckets) < 1000
+
+
+def test_streaming_stats():
+    stats = StreamingStats()
+    assert np.isnan(stats.mean)
+    for v in [3, 1, 2]:
+        stats.add(v)
+    assert (stats.count, stats.mean, stats.min, stats.max) == (3, 2, 1, 3)
+    assert list(stats.summary('wait', [0.5])) == ['mean_wait', 'max_wait', 'wait_p50']
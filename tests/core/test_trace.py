@@ -0,0 +1,108 @@
+import pytest
+from pandas import concat
+from pandas.testing import assert_frame_equal
+from chronon import ProcessManager, EventManager, Process, TraceSink, TraceReader
+
+
+def run_model(trace=None, run=True, interval=0.5):
+    pm = ProcessManager()
+    pm.create_resource('counter', capacity=2)
+
+    class UseCounter(Process):
+        def definition(self, user):
+            user.set_checkpoint('Arrived')
+            yield user.waits('counter', patience=4)
+            yield user.waits(3)
+            user.releases('counter')
+            user.set_checkpoint('Left')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm, trace=trace)
+    for i in range(10):
+        em.create_user(f'user_{i}', instant=interval * i)
+    if run:
+        em.run()
+    return em
+
+
+@pytest.mark.parametrize('trace_format', ['csv', 'parquet', 'arrow'])
+def test_trace_sink(tmp_path, trace_format):
+    if trace_format != 'csv':
+        pytest.importorskip('pyarrow')
+    expected = run_model()
+    sink = TraceSink(str(tmp_path), format=trace_format, batch_size=7)
+    em = run_model(sink)
+    resource = em.pm.get_resource('counter')
+
+    # Records are streamed to the files, with buffers written once the run ends
+    assert len(resource.usage_log._instant) == 0
+    assert len(em.um.checkpoint_log._instant) == 0
+    assert all(len(b['instant']) == 0 for b in sink._buffers.values())
+    reader = TraceReader(str(tmp_path))
+    assert len(reader.get_checkpoints()) == len(expected.checkpoints)
+    assert len(reader.get_usage('counter')) == \
+        len(expected.pm.get_resource('counter').usage_log)
+
+    assert_frame_equal(em.checkpoints, expected.checkpoints, check_dtype=False)
+    assert_frame_equal(
+        em.get_checkpoints(user='user_3', start=2),
+        expected.get_checkpoints(user='user_3', start=2),
+        check_dtype=False
+    )
+    assert em.get_user('user_3').checkpoints == \
+        expected.get_user('user_3').checkpoints
+    assert_frame_equal(
+        resource.usage, expected.pm.get_resource('counter').usage, check_dtype=False
+    )
+    assert_frame_equal(
+        em.get_states([1, 4.2, 10]), expected.get_states([1, 4.2, 10]),
+        check_dtype=False
+    )
+
+    # Traces can be reloaded after the run
+    reader = TraceReader(str(tmp_path))
+    assert reader.format == trace_format
+    assert len(reader.get_checkpoints()) == len(expected.checkpoints)
+
+
+@pytest.mark.parametrize('trace_format', ['csv', 'parquet', 'arrow'])
+def test_trace_int_instants(tmp_path, trace_format):
+    if trace_format != 'csv':
+        pytest.importorskip('pyarrow')
+    expected = run_model(interval=1)
+    em = run_model(TraceSink(str(tmp_path), format=trace_format), interval=1)
+
+    # Instants are reported as ints if all of them are, as in memory
+    assert_frame_equal(em.checkpoints, expected.checkpoints)
+    assert_frame_equal(
+        em.pm.get_resource('counter').usage, expected.pm.get_resource('counter').usage
+    )
+    assert TraceReader(str(tmp_path)).get_checkpoints()['instant'].dtype == 'int64'
+
+
+@pytest.mark.parametrize('trace_format', ['csv', 'parquet'])
+def test_trace_read_incrementally(tmp_path, trace_format):
+    if trace_format != 'csv':
+        pytest.importorskip('pyarrow')
+    expected = run_model()
+    sink = TraceSink(str(tmp_path), format=trace_format, batch_size=3)
+    em = run_model(sink, run=False)
+    checkpoints = []
+    usages = []
+    for _ in em.run_chunks(interval=1):
+        checkpoints.append(em.get_new_checkpoints())
+        usages.append(em.get_new_usage('counter'))
+
+    assert_frame_equal(
+        concat(checkpoints, ignore_index=True), expected.checkpoints, check_dtype=False
+    )
+    assert_frame_equal(
+        concat(usages, ignore_index=True).drop(columns='resource'),
+        expected.pm.get_resource('counter').usage,
+        check_dtype=False
+    )
+
+    # Reads start from the batch of the first record to read
+    n_records = sink.n_records('usage')
+    assert list(sink.batches('usage', n_records)) == []
+    assert len(concat(sink.batches('usage', n_records - 4))) == 4
@@ -1,8 +1,11 @@
 from chronon import Process
 from chronon import ProcessManager
 from chronon import EventManager
+from chronon import CompactUser, User
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
+import pytest
 
 
 def test_wait_for_time():
@@ -24,3 +27,124 @@ def test_wait_for_time():
     em.create_user('user_test')
     em.run()
     assert em.checkpoints['instant'][0] == 1609459264.2
+
+
+def test_wait_for_time_value():
+    pm = ProcessManager()
+    values = []
+
+    class TestProcess(Process):
+        def definition(self, user):
+            for patience in ['unlimited', 10]:
+                values.append((yield user.waits(1, patience=patience)))
+            values.append((yield user.waits(1)))
+            values.append((yield user.waits(timedelta(minutes=1))))
+
+    pm.attach_process(TestProcess)
+    em = EventManager(pm)
+    em.create_user('user_test')
+
+    # Delays without patience are bare timeouts, resulting in no value
+    assert type(em.get_user('user_test').waits(1)).__name__ == 'Timeout'
+    em.run()
+    unlimited, patient, *delays = values
+    assert unlimited is None and delays == [None, None]
+    # With a patience, a condition on the delay and the patience
+    assert type(patient).__name__ == 'ConditionValue'
+    assert [type(e).__name__ for e in patient.events] == ['Timeout']
+    assert list(patient.values()) == [None]
+
+
+def test_compact_user():
+    pm = ProcessManager()
+    pm.create_resource('test1')
+
+    class TestProcess(Process):
+        def definition(self, user):
+            yield user.waits(user.resource_needed)
+            yield user.waits(user.delay)
+            user.releases(user.resource_needed)
+            user.set_checkpoint(f'Finished {user.color}')
+
+    pm.attach_process(TestProcess)
+    em = EventManager(pm)
+    em.create_user(['user_1', 'user_2'], custom_user=CompactUser,
+                   resource_needed='test1', delay=2, color='red')
+    em.set_user('user_2', color='blue', instant=1)
+    em.run()
+
+    user = em.get_user('user_2')
+    assert user.instant == 1 and user.color == 'blue'
+    assert user.checkpoints == [{'instant': 4, 'info': 'Finished blue'}]
+    assert list(em.checkpoints['user']) == ['user_1', 'user_2']
+    with pytest.raises(AttributeError):
+        user.weight
+    with pytest.raises(AttributeError):
+        user.__dict__
+
+    # Rows of removed users are reused
+    em.um.remove_user('user_1')
+    em.create_user('user_3', custom_user=CompactUser)
+    assert em.um.get_user_table(CompactUser).get(em.get_user('user_3')._row, 'instant') == 0
+    with pytest.raises(AttributeError):
+        em.get_user('user_3').color
+
+
+def test_create_users():
+    pm = ProcessManager()
+    pm.create_resource('test1')
+
+    class TestProcess(Process):
+        def definition(self, user):
+            yield user.waits(user.resource_needed)
+            yield user.waits(user.delay)
+            user.releases(user.resource_needed)
+            user.set_checkpoint(f'Finished {user.color}')
+
+    pm.attach_process(TestProcess)
+    em = EventManager(pm)
+    em.create_user('user_0', custom_user=CompactUser, resource_needed='test1', delay=1,
+                   color='green')
+    users = em.create_users(
+        pd.DataFrame({
+            'name': ['user_1', 'user_2'],
+            'instant': [2, 3],
+            'delay': np.array([2, 1]),
+            'color': ['red', 'blue'],
+        }),
+        resource_needed='test1'
+    )
+    assert [type(u) for u in users] == [CompactUser, CompactUser]
+    assert type(users[0].delay) is int
+    assert users[1].initial_process == 'initial'
+    with pytest.raises(AttributeError):
+        users[0].weight
+    em.run()
+    assert em.checkpoints.to_dict('list') == {
+        'user': ['user_0', 'user_1', 'user_2'],
+        'instant': [1, 4, 5],
+        'info': ['Finished green', 'Finished red', 'Finished blue'],
+    }
+
+    # Users created again replace the previous ones, and enter the next run
+    table = em.um.get_user_table(CompactUser)
+    em.create_users({'name': ['user_2'], 'color': ['white'], 'delay': [1]},
+                    resource_needed='test1')
+    assert em.get_user('user_2').color == 'white'
+    assert em.get_user('user_2').instant == 0
+    assert users[1]._row in table._free_rows
+    em.run()
+    assert list(em.checkpoints['info']).count('Finished white') == 1
+    with pytest.raises(ValueError):
+        em.create_users({'name': ['user_3', 'user_4'], 'color': ['white']})
+
+    # Users still in the simulation can't be replaced
+    em.create_users({'name': ['user_6'], 'delay': [5], 'color': ['grey']},
+                    resource_needed='test1')
+    em.run(until=em.pm.env.now + 1)
+    with pytest.raises(ValueError):
+        em.create_users({'name': ['user_6'], 'color': ['white']})
+
+    # Other user classes are created user by user
+    users = em.create_users({'name': ['user_5']}, custom_user=User, color='black')
+    assert type(users[0]) is User and users[0].color == 'black'
@@ -1,6 +1,12 @@
+import multiprocessing
+import time
+import pytest
+from pandas import DataFrame, concat
+from pandas.testing import assert_frame_equal
 from chronon import EventManager
 from chronon import ProcessManager
 from chronon import Process
+from chronon.helpers.arrivals import generate_arrivals, read_arrivals
 
 def test_create_user():
     pm = ProcessManager()
@@ -26,3 +32,366 @@ def test_run():
     em = EventManager(pm)
     em.create_user(f'user_test')
     em.run()
+
+
+def test_get_states():
+    pm = ProcessManager()
+    pm.create_resource('counter', capacity=2)
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            yield user.waits('counter', patience=2)
+            if user in [r.user for r in self.get_resource('counter').users]:
+                yield user.waits(3)
+            user.releases('counter')
+    pm.attach_process(TestProcess1)
+
+    em = EventManager(pm)
+    for i in range(10):
+        em.create_user(f'user_{i}', instant=i / 2)
+    # Replay from periodic snapshots as well
+    pm.get_resource('counter').usage_log.snapshot_interval = 3
+    em.run()
+
+    usage = pm.get_resource('counter').usage
+    instants = [6, -1, 0, 0.5, 1.25, 2, 3.5, 4, 100]
+    states = em.get_states(instants)
+    assert list(states['instant']) == sorted(instants)
+    for at in instants:
+        expected = usage[usage['instant'] <= at].tail(1)
+        state = em.get_state(at)
+        assert list(state.columns) == ['resource', 'users', 'queue']
+        if expected.empty:
+            assert state['users'][0] == [] and state['queue'][0] == []
+        else:
+            assert state['users'][0] == expected['users'].values[0]
+            assert state['queue'][0] == expected['queue'].values[0]
+            assert states[states['instant'] == at]['users'].values[0] == state['users'][0]
+
+
+def test_create_arrivals():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            yield user.waits('counter')
+            yield user.waits(0.5)
+            user.releases('counter')
+            user.set_checkpoint(f'Finished {user.color}')
+    pm.attach_process(TestProcess1)
+
+    em = EventManager(pm)
+    em.create_arrivals(generate_arrivals(1, n=100, prefix='customer_', color='red'))
+    em.create_arrivals(
+        [{'name': 'vip', 'instant': 10.2, 'color': 'gold'}], keep_users=True)
+    em.run()
+
+    assert len(em.checkpoints) == 101
+    assert em.checkpoints['info'][10] == 'Finished gold'
+    assert em.checkpoints['instant'][100] == 100.5
+    # Only users kept after leaving the simulation remain
+    assert list(em.um.users) == ['vip']
+
+
+@pytest.mark.parametrize('arrival_format', ['csv', 'parquet'])
+def test_read_arrivals(tmp_path, arrival_format):
+    if arrival_format != 'csv':
+        pytest.importorskip('pyarrow')
+    pm = ProcessManager()
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            yield user.waits(user.delay)
+            user.set_checkpoint(f'Finished {user.color}')
+    pm.attach_process(TestProcess1)
+
+    arrivals = DataFrame({
+        'name': [f'customer_{i}' for i in range(20)],
+        'instant': [0.5 * i for i in range(20)],
+        'delay': [1] * 10 + [2] * 10,
+    })
+    path = str(tmp_path / f'arrivals.{arrival_format}')
+    if arrival_format == 'csv':
+        arrivals.to_csv(path, index=False)
+    else:
+        arrivals.to_parquet(path, index=False)
+
+    em = EventManager(pm)
+    em.create_arrivals(read_arrivals(path, chunk_size=3, color='red'), keep_users=True)
+
+    # Users are only created as the simulation reaches them
+    em.run(until=4.2)
+    assert len(em.um.users) == 9
+    em.run()
+    assert len(em.checkpoints) == 20
+    assert em.get_user('customer_12').delay == 2
+    assert em.checkpoints['instant'][19] == 11.5
+    assert set(em.checkpoints['info']) == {'Finished red'}
+
+    with pytest.raises(ValueError):
+        read_arrivals(path, format='json')
+
+
+def test_get_checkpoints():
+    pm = ProcessManager()
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            user.set_checkpoint('Arrived')
+            yield user.waits(user.delay)
+            user.set_checkpoint('Left')
+    pm.attach_process(TestProcess1)
+
+    em = EventManager(pm)
+    for i in range(5):
+        em.create_user(f'user_{i}', instant=i, delay=10 - i)
+    em.run()
+
+    checkpoints = em.checkpoints
+    assert list(checkpoints['instant']) == sorted(checkpoints['instant'])
+    assert list(checkpoints.columns) == ['user', 'instant', 'info']
+    # Instants are reported as ints, as all of them are
+    assert checkpoints['instant'].dtype == 'int64'
+    assert len(em.get_checkpoints(start=2, end=4)) == 3
+    user_checkpoints = em.get_checkpoints(user='user_3', start=5)
+    assert list(user_checkpoints['info']) == ['Left']
+    assert em.get_user('user_3').checkpoints == [
+        {'instant': 3, 'info': 'Arrived'}, {'instant': 10, 'info': 'Left'}
+    ]
+    assert type(em.get_user('user_3').checkpoints[0]['instant']) is int
+    assert em.get_checkpoints(user='nobody').empty
+
+
+def test_checkpoint_info_values():
+    pm = ProcessManager()
+    infos = [{'step': 1}, [1, 2], 1, True, 1.0, {'step': 1}]
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            for info in infos:
+                user.set_checkpoint(info)
+            yield user.waits(1)
+    pm.attach_process(TestProcess1)
+
+    em = EventManager(pm)
+    em.create_user('user_test')
+    em.run()
+
+    # Unhashable infos are kept too, and equal infos keep their own type
+    recorded = [c['info'] for c in em.get_user('user_test').checkpoints]
+    assert recorded == infos
+    assert [type(info) for info in recorded] == [type(info) for info in infos]
+    assert list(em.checkpoints['info']) == infos
+
+
+def test_summaries():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class UseCounter(Process):
+        def definition(self, user):
+            yield user.waits('counter')
+            yield user.waits(2)
+            user.releases('counter')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    for i in range(3):
+        em.create_user(f'user_{i}', instant=1.5 * i)
+    em.run()
+
+    resources = em.get_resource_summary()
+    assert resources.loc['counter', 'grants'] == 3
+    assert resources.loc['counter', 'max_queue'] == 1
+    assert resources.loc['counter', 'busy_time'] == 6
+    assert resources.loc['counter', 'mean_wait'] == 0.5
+    assert resources.loc['counter', 'wait_p99'] == pytest.approx(1, rel=0.01)
+
+    processes = em.get_process_summary(quantiles=[0.5])
+    assert processes.loc['UseCounter', 'completions'] == 3
+    assert processes.loc['UseCounter', 'max_duration'] == 3
+    assert processes.loc['UseCounter', 'duration_p50'] == pytest.approx(2.5, rel=0.01)
+
+    waits = em.get_waiting_summary()
+    assert waits.loc[('UseCounter', 'counter'), 'waits'] == 3
+    assert waits.loc[('UseCounter', 'counter'), 'max_wait'] == 1
+
+
+def test_max_queue_uncontended():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class UseCounter(Process):
+        def definition(self, user):
+            yield user.waits('counter')
+            yield user.waits(2)
+            user.releases('counter')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    em.create_user('user_0')
+    em.run()
+
+    # Requests granted at once are not counted as queueing
+    resources = em.get_resource_summary()
+    assert resources.loc['counter', 'grants'] == 1
+    assert resources.loc['counter', 'max_queue'] == 0
+
+
+def test_profile():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class UseCounter(Process):
+        def definition(self, user):
+            yield user.waits('counter')
+            yield user.waits(2)
+            user.releases('counter')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    for i in range(3):
+        em.create_user(f'user_{i}', instant=1.5 * i)
+
+    with pytest.raises(ValueError):
+        em.get_profile_summary()
+    em.run(profile=True)
+
+    profile = em.get_profile_summary()
+    assert profile.loc[('request', 'counter'), 'calls'] == 3
+    assert profile.loc[('release', 'counter'), 'calls'] == 3
+    assert profile.loc[('update_usage', 'counter'), 'calls'] == 9
+    assert ('condition', 'UseCounter') in profile.index
+    assert ('process', 'BaseUser.run') in profile.index
+    # Instrumentation is removed after the run
+    assert 'step' not in vars(pm.env)
+    assert 'update_usage' not in vars(pm.get_resource('counter'))
+
+
+def test_run_until():
+    pm = ProcessManager()
+
+    class TestProcess1(Process):
+        def definition(self, user):
+            yield user.waits(2, patience=10)
+            user.set_checkpoint('Waited')
+    pm.attach_process(TestProcess1)
+    em = EventManager(pm)
+    em.create_user('user_0')
+
+    # The clock stops at `until`, with events after it left for the next run
+    em.run(until=5)
+    assert em.pm.env.now == 5
+    assert em.pm.env.peek() == 10
+    em.run()
+    assert em.pm.env.now == 10
+    assert list(em.checkpoints['instant']) == [2]
+    with pytest.raises(ValueError):
+        em.run(until=5)
+
+
+def test_run_chunks():
+    def build():
+        pm = ProcessManager()
+        pm.create_resource('counter')
+
+        class UseCounter(Process):
+            def definition(self, user):
+                user.set_checkpoint('Arrived')
+                yield user.waits('counter')
+                yield user.waits(2)
+                user.releases('counter')
+                user.set_checkpoint('Left')
+
+        pm.attach_process(UseCounter)
+        em = EventManager(pm)
+        for i in range(5):
+            em.create_user(f'user_{i}', instant=1.5 * i)
+        return em
+
+    expected = build()
+    expected.run()
+    usage = expected.pm.get_resource('counter').usage
+
+    em = build()
+    instants = []
+    checkpoints = []
+    usages = []
+    for now in em.run_chunks(interval=2.5):
+        instants.append(now)
+        checkpoints.append(em.get_new_checkpoints())
+        usages.append(em.get_new_usage())
+    assert instants == [2.5, 5, 7.5, 10, 12.5]
+    assert len(checkpoints[0]) == 3
+    assert_frame_equal(concat(checkpoints, ignore_index=True), expected.checkpoints)
+    usages = concat(usages, ignore_index=True)
+    assert (usages['resource'] == 'counter').all()
+    assert_frame_equal(usages.drop(columns='resource'), usage, check_dtype=False)
+    assert em.get_new_usage().empty
+
+    em = build()
+    assert em.step(3) == 3
+    em.run_until(4)
+    assert em.pm.env.now == 4
+    em.run_until(3)
+    assert em.pm.env.now == 4
+    instants = list(em.run_chunks(n_events=10, until=9))
+    assert instants == sorted(instants) and instants[-1] == 9
+    assert em.step(1000) < 1000
+    assert_frame_equal(em.checkpoints, expected.checkpoints)
+
+
+def test_fork():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+
+    class UseCounter(Process):
+        def definition(self, user):
+            yield user.waits('counter')
+            yield user.waits(user.duration)
+            user.releases('counter')
+            user.set_checkpoint('Left')
+
+    pm.attach_process(UseCounter)
+    em = EventManager(pm)
+    for i in range(4):
+        em.create_user(f'user_{i}', instant=i, duration=2)
+    em.run_until(3)
+
+    def more_users(em):
+        em.create_user('user_late', instant=4, duration=2)
+        em.run()
+        return em.checkpoints
+
+    def longer_durations(em):
+        for i in range(4):
+            em.set_user(f'user_{i}', duration=3)
+        em.run()
+        return em.checkpoints
+
+    def failing(em):
+        raise KeyError('branch')
+
+    def sleeping(em):
+        time.sleep(60)
+
+    def unpicklable(em):
+        return lambda: None
+
+    branches = em.fork(
+        {'more_users': more_users, 'longer_durations': longer_durations}, workers=1
+    )
+    # Branches share the warm-up, during which user_0 left
+    assert list(branches['more_users']['instant']) == [2, 4, 6, 8, 10]
+    assert list(branches['longer_durations']['instant']) == [2, 4, 7, 10]
+    assert em.pm.env.now == 3
+    with pytest.raises(KeyError):
+        em.fork({'failing': failing, 'sleeping': sleeping})
+    # Other branches are stopped once one fails
+    assert multiprocessing.active_children() == []
+    with pytest.raises(RuntimeError, match='Branch unpicklable failed'):
+        em.fork({'unpicklable': unpicklable})
+
+    em.run()
+    assert list(em.checkpoints['instant']) == [2, 4, 6, 8]
@@ -173,3 +173,59 @@ def test_set_flow_need_sequence():
     with pytest.raises(ValueError):
         em = EventManager(pm)
 
+
+def test_block_flow_routes():
+    pm = ProcessManager()
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            va = True
+
+    pm.attach_process(TestProcess1)
+
+    class TestProcess2(Process):
+        def definition(self, user, **kwargs):
+            bene = True
+
+    pm.attach_process(TestProcess2)
+
+    pm.set_flow(sequence=['TestProcess1', 'TestProcess2'])
+    pm.set_flow(initial_process='TestProcess2')
+    pm.block_flow()
+
+    assert pm.next_process('TestProcess1') == 'TestProcess2'
+    assert pm.next_process('TestProcess2') == 'final'
+    # Parallel flows are allowed, provided users declare their initial process
+    with pytest.raises(ValueError):
+        pm.next_process('initial')
+
+
+def test_block_flow_non_unique_next_process():
+    pm = ProcessManager()
+
+    class TestProcess1(Process):
+        def definition(self, user, **kwargs):
+            va = True
+
+    pm.attach_process(TestProcess1)
+
+    class TestProcess2(Process):
+        def definition(self, user, **kwargs):
+            bene = True
+
+    pm.attach_process(TestProcess2)
+
+    pm.set_flow(sequence=['TestProcess1', 'TestProcess2'])
+    pm.set_flow(from_process='TestProcess1', to_process='final')
+
+    with pytest.raises(ValueError):
+        EventManager(pm)
+
+
+def test_set_flow_long_sequence():
+    pm = ProcessManager()
+    sequence = [f'TestProcess{i}' for i in range(1000)]
+    pm.set_flow(sequence=sequence)
+
+    assert len(pm.flow) == 1001
+    assert pm.flow['from'][1000] == 'TestProcess999' and pm.flow['to'][1000] == 'final'
@@ -0,0 +1,47 @@
+import random
+from chronon import ReplicationManager
+from chronon import ProcessManager
+from chronon import EventManager
+from chronon import Process
+
+
+class ServeCustomer(Process):
+    def definition(self, user, **kwargs):
+        yield user.waits('counter')
+        yield user.waits(random.expovariate(1))
+        user.releases('counter')
+        user.set_checkpoint('Finished')
+
+
+def build():
+    pm = ProcessManager()
+    pm.create_resource('counter')
+    pm.attach_process(ServeCustomer)
+    em = EventManager(pm)
+    for i in range(3):
+        em.create_user(f'user_{i}', instant=random.uniform(0, 2))
+    return em
+
+
+def test_run_replications():
+    rep = ReplicationManager(build, seed=42)
+    rep.run(4, workers=1)
+
+    assert len(rep.replications) == 4
+    assert list(rep.checkpoints['replication'].unique()) == [0, 1, 2, 3]
+    assert len(rep.checkpoints) == 12
+    usage = rep.usage['counter']
+    assert list(usage.columns) == \
+        ['replication', 'instant', 'user', 'status', 'users', 'queue']
+    # Replications are different from each other
+    assert rep.checkpoints.groupby('replication')['instant'].max().nunique() == 4
+
+
+def test_replications_independent_of_workers():
+    rep_serial = ReplicationManager(build, seed=42)
+    rep_serial.run(4, workers=1)
+    rep_parallel = ReplicationManager(build, seed=42)
+    rep_parallel.run(4, workers=2)
+
+    assert rep_serial.checkpoints.equals(rep_parallel.checkpoints)
+    assert rep_serial.usage['counter'].equals(rep_parallel.usage['counter'])
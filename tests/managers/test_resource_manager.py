@@ -1,3 +1,6 @@
+from chronon import Process
+from chronon import ProcessManager
+from chronon import EventManager
 from chronon import ResourceManager
 from chronon import Resource
 import simpy
@@ -17,3 +20,51 @@ def test_get_resource():
     dummy_resource = ['test1']
     rm.create_resource(dummy_resource)
     assert isinstance(rm.get_resource('test1'), Resource)
+
+
+def test_get_resources_by_properties():
+    env = simpy.Environment
+    rm = ResourceManager(env)
+    rm.create_resource(['dock1', 'dock2'], type='dock', station='A')
+    rm.create_resource('dock3', type='dock', station='B')
+    rm.create_resource('bike1', type='bike')
+
+    docks = rm.get_resources(by_properties={'type': 'dock', 'station': 'A'})
+    assert [r.name for r in docks] == ['dock1', 'dock2']
+    assert rm.get_resources(by_properties={'name': 'bike1'}) == [rm.get_resource('bike1')]
+
+    # Index follows changes in properties
+    rm.get_resource('dock2').station = 'B'
+    docks = rm.get_resources(by_properties={'type': 'dock', 'station': 'B'})
+    assert [r.name for r in docks] == ['dock3', 'dock2']
+
+    # Non indexed properties
+    assert len(rm.get_resources(by_properties={'report': True})) == 4
+
+
+def test_get_resources_by_user():
+    pm = ProcessManager()
+    pm.create_resource(['R1', 'R2'], type='test')
+
+    class TestProcess(Process):
+        def definition(self, user):
+            yield user.waits('R1')
+            user.requests('R1')
+            assert self.get_resources(by_user=user) == [self.get_resource('R1')]
+            assert self.get_resources(by_user='any') == [self.get_resource('R1')]
+            assert self.get_resources(by_user_queueing=user.name) == [
+                self.get_resource('R1')
+            ]
+            assert self.get_resources(
+                by_user=user, by_properties={'name': 'R2'}) == []
+            yield user.waits(1)
+            user.releases(['R1', 'R1'])
+            assert self.get_resources(by_user='any') == []
+            assert self.get_resources(by_user_queueing='any') == []
+            user.set_checkpoint('Finished')
+
+    pm.attach_process(TestProcess)
+    em = EventManager(pm)
+    em.create_user('user_test')
+    em.run()
+    assert len(em.checkpoints) == 1